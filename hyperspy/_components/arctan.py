@@ -17,7 +17,10 @@
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
 
+import numpy as np
+
 from hyperspy._components.expression import Expression
+from hyperspy.component import _estimate_step_parameters
 
 
 class Arctan(Expression):
@@ -65,3 +68,57 @@ def __init__(self, A=1.0, k=1.0, x0=1.0, module="numpy", **kwargs):
             autodoc=False,
             **kwargs,
         )
+
+    def estimate_parameters(self, signal, x1, x2, only_current=False):
+        """Estimate the arctan function from the step and its derivative.
+
+        ``A`` is estimated from the difference between the levels at both ends
+        of the range, ``x0`` from the centroid of the derivative and ``k``
+        from the maximum of the derivative.
+
+        Parameters
+        ----------
+        signal : :class:`~.api.signals.Signal1D`
+        x1 : float
+            Defines the left limit of the spectral range to use for the
+            estimation.
+        x2 : float
+            Defines the right limit of the spectral range to use for the
+            estimation.
+        only_current : bool
+            If False estimates the parameters for the full dataset.
+
+        Returns
+        -------
+        bool
+
+        Examples
+        --------
+
+        >>> arctan = hs.model.components1D.Arctan(A=2, k=0.5, x0=1)
+        >>> x = np.arange(-100, 100, 0.1)
+        >>> s = hs.signals.Signal1D(np.tile(arctan.function(x), (4, 1)))
+        >>> s.axes_manager[-1].offset = -100
+        >>> s.axes_manager[-1].scale = 0.1
+        >>> arctan.estimate_parameters(s, -100, 100)
+        True
+        """
+        super()._estimate_parameters(signal)
+        _, step, x0, steepness = _estimate_step_parameters(signal, x1, x2, only_current)
+
+        if only_current is True:
+            self.A.value = step / np.pi
+            self.k.value = np.pi * steepness
+            self.x0.value = x0
+            return True
+        else:
+            if self.A.map is None:
+                self._create_arrays()
+            self.A.map["values"][:] = step / np.pi
+            self.A.map["is_set"][:] = True
+            self.k.map["values"][:] = np.pi * steepness
+            self.k.map["is_set"][:] = True
+            self.x0.map["values"][:] = x0
+            self.x0.map["is_set"][:] = True
+            self.fetch_stored_values()
+            return True
@@ -16,9 +16,11 @@
 # You should have received a copy of the GNU General Public License
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
+import dask.array as da
 import numpy as np
 
 from hyperspy._components.expression import Expression
+from hyperspy.component import _get_estimation_data, _linear_regression
 
 
 class Bleasdale(Expression):
@@ -70,6 +72,61 @@ def __init__(self, a=1.0, b=1.0, c=1.0, module=None, **kwargs):
                 f"{module} is not supported for this component, use numexpr instead."
             )
 
+    def estimate_parameters(self, signal, x1, x2, only_current=False):
+        r"""Estimate ``a`` and ``b`` for the current value of ``c``.
+
+        Since :math:`f(x)^{-c} = a + b\cdot x`, ``a`` and ``b`` are
+        estimated by linear least squares of :math:`f(x)^{-c}` against
+        :math:`x`, using only the positive data points.
+
+        Parameters
+        ----------
+        signal : :class:`~.api.signals.Signal1D`
+        x1 : float
+            Defines the left limit of the spectral range to use for the
+            estimation.
+        x2 : float
+            Defines the right limit of the spectral range to use for the
+            estimation.
+        only_current : bool
+            If False estimates the parameters for the full dataset.
+
+        Returns
+        -------
+        bool
+
+        Examples
+        --------
+
+        >>> bleasdale = hs.model.components1D.Bleasdale(a=1, b=2, c=0.5)
+        >>> x = np.arange(0, 10, 0.1)
+        >>> s = hs.signals.Signal1D(np.tile(bleasdale.function(x), (4, 1)))
+        >>> s.axes_manager[-1].scale = 0.1
+        >>> bleasdale.estimate_parameters(s, 0, 10)
+        True
+        """
+        super()._estimate_parameters(signal)
+        X, data = _get_estimation_data(signal, x1, x2, only_current)
+        positive = data > 0
+        y = np.where(positive, data, 1) ** -self.c.value
+        a, b = _linear_regression(X, y, where=positive)
+        if isinstance(data, da.Array):
+            a, b = da.compute(a, b)
+
+        if only_current is True:
+            self.a.value = float(a)
+            self.b.value = float(b)
+            return True
+        else:
+            if self.a.map is None:
+                self._create_arrays()
+            self.a.map["values"][:] = a
+            self.a.map["is_set"][:] = True
+            self.b.map["values"][:] = b
+            self.b.map["is_set"][:] = True
+            self.fetch_stored_values()
+            return True
+
     def grad_a(self, x):
         """
         Returns d(function)/d(parameter_1)
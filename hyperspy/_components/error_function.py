@@ -16,7 +16,14 @@
 # You should have received a copy of the GNU General Public License
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
+import math
+
+import numpy as np
+
 from hyperspy._components.expression import Expression
+from hyperspy.component import _estimate_step_parameters
+
+sqrt2pi = math.sqrt(2 * math.pi)
 
 
 class Erf(Expression):
@@ -68,3 +75,61 @@ def __init__(
 
         self.isbackground = False
         self.convolved = True
+
+    def estimate_parameters(self, signal, x1, x2, only_current=False):
+        """Estimate the error function from the step and its derivative.
+
+        ``A`` is estimated from the difference between the levels at both ends
+        of the range, ``origin`` from the centroid of the derivative and
+        ``sigma`` from the maximum of the derivative.
+
+        Parameters
+        ----------
+        signal : :class:`~.api.signals.Signal1D`
+        x1 : float
+            Defines the left limit of the spectral range to use for the
+            estimation.
+        x2 : float
+            Defines the right limit of the spectral range to use for the
+            estimation.
+        only_current : bool
+            If False estimates the parameters for the full dataset.
+
+        Returns
+        -------
+        bool
+
+        Examples
+        --------
+
+        >>> erf = hs.model.components1D.Erf(A=5, sigma=2, origin=1)
+        >>> x = np.arange(-20, 20, 0.1)
+        >>> s = hs.signals.Signal1D(np.tile(erf.function(x), (4, 1)))
+        >>> s.axes_manager[-1].offset = -20
+        >>> s.axes_manager[-1].scale = 0.1
+        >>> erf.estimate_parameters(s, -20, 20)
+        True
+        """
+        super()._estimate_parameters(signal)
+        low, step, origin, steepness = _estimate_step_parameters(
+            signal, x1, x2, only_current
+        )
+        # A decreasing step is described by a negative sigma, A is positive
+        sigma = np.copysign(1 / (sqrt2pi * steepness), step)
+
+        if only_current is True:
+            self.A.value = abs(step)
+            self.sigma.value = sigma
+            self.origin.value = origin
+            return True
+        else:
+            if self.A.map is None:
+                self._create_arrays()
+            self.A.map["values"][:] = abs(step)
+            self.A.map["is_set"][:] = True
+            self.sigma.map["values"][:] = sigma
+            self.sigma.map["is_set"][:] = True
+            self.origin.map["values"][:] = origin
+            self.origin.map["is_set"][:] = True
+            self.fetch_stored_values()
+            return True
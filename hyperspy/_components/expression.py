@@ -161,6 +161,8 @@ class docstring.
 
     """
 
+    _model_data_cacheable = True
+
     def __init__(
         self,
         expression,
@@ -323,11 +325,15 @@ def f(x):
                 return self._f(x, *[p.value for p in self.parameters])
 
         setattr(self, "function", f)
+        self._model_data_cache = None
         parnames = [
             self._rename_pars.get(symbol.name, symbol.name) for symbol in parameters
         ]
         self._parameter_strings = parnames
 
+        # The lambdified gradients, used to evaluate the gradients for all
+        # navigation indices at once in `_gradient_nd`
+        self._f_grad = {}
         if self._compute_gradients:
             try:
                 ffargs = _fill_function_args_2d if self._is2D else _fill_function_args
@@ -340,6 +346,7 @@ def f(x):
                         modules=module,
                         dummify=False,
                     )
+                    self._f_grad[name] = f_grad
                     grad_p = ffargs(f_grad).__get__(self, Expression)
                     if len(grad_expr.free_symbols) == 0:
                         # Vectorize in case of constant function
@@ -380,6 +387,22 @@ def function_nd(self, *args):
 
     function_nd.__doc__ %= FUNCTION_ND_DOCSTRING
 
+    def _gradient_nd(self, parameter, x):
+        """Returns the partial derivative of the component with respect to
+        ``parameter`` for all the indices of the parameter maps, similarly to
+        :meth:`function_nd`. Only implemented for 1D components.
+        """
+        if self._is2D:
+            raise NotImplementedError(
+                "The gradient is only implemented for 1D components."
+            )
+        values = [p.map["values"][..., np.newaxis] for p in self.parameters]
+        grad = self._f_grad[parameter.name](x[np.newaxis, ...], *values)
+        # The gradient can be constant, i.e. a scalar
+        out = np.zeros(self.parameters[0].map.shape + x.shape)
+        out += grad
+        return out
+
     @property
     def _constant_term(self):
         """
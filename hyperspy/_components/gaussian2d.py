@@ -18,6 +18,7 @@
 
 import math
 
+import dask.array as da
 import numpy as np
 
 from hyperspy._components.expression import Expression
@@ -105,6 +106,106 @@ def __init__(
         self.isbackground = False
         self.convolved = True
 
+    def estimate_parameters(
+        self, signal, x1=None, x2=None, y1=None, y2=None, only_current=False
+    ):
+        """Estimate the Gaussian by calculating the image moments.
+
+        The centre is the centroid of the intensity, the widths are the
+        square root of the second central moments along each axis and the
+        volume is the integrated intensity. The rotation angle, if any, is
+        not estimated.
+
+        Parameters
+        ----------
+        signal : :class:`~.api.signals.Signal2D`
+        x1, x2 : float or None
+            Define the limits of the range along the horizontal axis to use
+            for the estimation. If None, the limits of the axis are used.
+        y1, y2 : float or None
+            Define the limits of the range along the vertical axis to use
+            for the estimation. If None, the limits of the axis are used.
+        only_current : bool
+            If False estimates the parameters for the full dataset.
+
+        Returns
+        -------
+        bool
+
+        Examples
+        --------
+
+        >>> g = hs.model.components2D.Gaussian2D(
+        ...     A=10, sigma_x=2, sigma_y=3, centre_x=1, centre_y=-1
+        ... )
+        >>> x = np.arange(-20, 20, 0.5)
+        >>> X, Y = np.meshgrid(x, x)
+        >>> s = hs.signals.Signal2D(np.tile(g.function(X, Y), (4, 1, 1)))
+        >>> for axis in s.axes_manager.signal_axes:
+        ...     axis.offset, axis.scale = -20, 0.5
+        >>> g.estimate_parameters(s)
+        True
+        """
+        super()._estimate_parameters(signal)
+        axis_x, axis_y = signal.axes_manager.signal_axes
+        ix1, ix2 = axis_x.value_range_to_indices(x1, x2)
+        iy1, iy2 = axis_y.value_range_to_indices(y1, y2)
+        X = axis_x.axis[ix1 : ix2 + 1]
+        Y = axis_y.axis[iy1 : iy2 + 1, np.newaxis]
+        if only_current is True:
+            data = signal._get_current_data()
+        else:
+            data = np.moveaxis(
+                signal.data,
+                (axis_y.index_in_array, axis_x.index_in_array),
+                (-2, -1),
+            )
+        data = data[..., iy1 : iy2 + 1, ix1 : ix2 + 1]
+
+        total = data.sum((-2, -1))
+        centre_x = (X * data).sum((-2, -1)) / total
+        centre_y = (Y * data).sum((-2, -1)) / total
+        sigma_x = np.sqrt(
+            abs(
+                ((X - centre_x[..., np.newaxis, np.newaxis]) ** 2 * data).sum((-2, -1))
+                / total
+            )
+        )
+        sigma_y = np.sqrt(
+            abs(
+                ((Y - centre_y[..., np.newaxis, np.newaxis]) ** 2 * data).sum((-2, -1))
+                / total
+            )
+        )
+        A = total * abs(axis_x.scale * axis_y.scale)
+        if isinstance(data, da.Array):
+            A, sigma_x, sigma_y, centre_x, centre_y = da.compute(
+                A, sigma_x, sigma_y, centre_x, centre_y
+            )
+
+        if only_current is True:
+            self.A.value = A
+            self.sigma_x.value = sigma_x
+            self.sigma_y.value = sigma_y
+            self.centre_x.value = centre_x
+            self.centre_y.value = centre_y
+            return True
+        else:
+            if self.A.map is None:
+                self._create_arrays()
+            self.A.map["values"][:] = A
+            self.A.map["is_set"][:] = True
+            self.sigma_x.map["values"][:] = sigma_x
+            self.sigma_x.map["is_set"][:] = True
+            self.sigma_y.map["values"][:] = sigma_y
+            self.sigma_y.map["is_set"][:] = True
+            self.centre_x.map["values"][:] = centre_x
+            self.centre_x.map["is_set"][:] = True
+            self.centre_y.map["values"][:] = centre_y
+            self.centre_y.map["is_set"][:] = True
+            self.fetch_stored_values()
+            return True
+
     @property
     def fwhm_x(self):
         return self.sigma_x.value * sigma2fwhm
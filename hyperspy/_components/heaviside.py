@@ -18,6 +18,7 @@
 
 
 from hyperspy._components.expression import Expression
+from hyperspy.component import _estimate_step_parameters
 
 
 class HeavisideStep(Expression):
@@ -74,3 +75,53 @@ def __init__(self, A=1.0, n=0.0, module="numpy", compute_gradients=False, **kwar
 
         self.isbackground = True
         self.convolved = False
+
+    def estimate_parameters(self, signal, x1, x2, only_current=False):
+        """Estimate the step height and position.
+
+        ``A`` is estimated from the difference between the levels at both ends
+        of the range and ``n`` from the centroid of the derivative.
+
+        Parameters
+        ----------
+        signal : :class:`~.api.signals.Signal1D`
+        x1 : float
+            Defines the left limit of the spectral range to use for the
+            estimation.
+        x2 : float
+            Defines the right limit of the spectral range to use for the
+            estimation.
+        only_current : bool
+            If False estimates the parameters for the full dataset.
+
+        Returns
+        -------
+        bool
+
+        Examples
+        --------
+
+        >>> step = hs.model.components1D.HeavisideStep(A=2, n=1)
+        >>> x = np.arange(-10, 10, 0.1)
+        >>> s = hs.signals.Signal1D(np.tile(step.function(x), (4, 1)))
+        >>> s.axes_manager[-1].offset = -10
+        >>> s.axes_manager[-1].scale = 0.1
+        >>> step.estimate_parameters(s, -10, 10)
+        True
+        """
+        super()._estimate_parameters(signal)
+        _, A, n, _ = _estimate_step_parameters(signal, x1, x2, only_current)
+
+        if only_current is True:
+            self.A.value = A
+            self.n.value = n
+            return True
+        else:
+            if self.A.map is None:
+                self._create_arrays()
+            self.A.map["values"][:] = A
+            self.A.map["is_set"][:] = True
+            self.n.map["values"][:] = n
+            self.n.map["is_set"][:] = True
+            self.fetch_stored_values()
+            return True
@@ -16,7 +16,10 @@
 # You should have received a copy of the GNU General Public License
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
+import numpy as np
+
 from hyperspy._components.expression import Expression
+from hyperspy.component import _estimate_step_parameters
 
 
 class Logistic(Expression):
@@ -72,3 +75,64 @@ def __init__(self, a=1.0, b=1.0, c=1.0, origin=0.0, module=None, **kwargs):
 
         # Boundaries
         self.isbackground = False
+
+    def estimate_parameters(self, signal, x1, x2, only_current=False):
+        """Estimate the logistic function from the step and its derivative.
+
+        ``a`` is estimated from the difference between the levels at both ends
+        of the range, ``origin`` from the centroid of the derivative and ``c``
+        from the maximum of the derivative. ``b`` is set to 1.
+
+        Parameters
+        ----------
+        signal : :class:`~.api.signals.Signal1D`
+        x1 : float
+            Defines the left limit of the spectral range to use for the
+            estimation.
+        x2 : float
+            Defines the right limit of the spectral range to use for the
+            estimation.
+        only_current : bool
+            If False estimates the parameters for the full dataset.
+
+        Returns
+        -------
+        bool
+
+        Examples
+        --------
+
+        >>> logistic = hs.model.components1D.Logistic(a=3, c=2, origin=1)
+        >>> x = np.arange(-10, 10, 0.1)
+        >>> s = hs.signals.Signal1D(np.tile(logistic.function(x), (4, 1)))
+        >>> s.axes_manager[-1].offset = -10
+        >>> s.axes_manager[-1].scale = 0.1
+        >>> logistic.estimate_parameters(s, -10, 10)
+        True
+        """
+        super()._estimate_parameters(signal)
+        _, step, origin, steepness = _estimate_step_parameters(
+            signal, x1, x2, only_current
+        )
+        # A decreasing step is described by a negative c, a is positive
+        c = np.copysign(4 * steepness, step)
+
+        if only_current is True:
+            self.a.value = abs(step)
+            self.b.value = 1.0
+            self.c.value = c
+            self.origin.value = origin
+            return True
+        else:
+            if self.a.map is None:
+                self._create_arrays()
+            self.a.map["values"][:] = abs(step)
+            self.a.map["is_set"][:] = True
+            self.b.map["values"][:] = 1.0
+            self.b.map["is_set"][:] = True
+            self.c.map["values"][:] = c
+            self.c.map["is_set"][:] = True
+            self.origin.map["values"][:] = origin
+            self.origin.map["is_set"][:] = True
+            self.fetch_stored_values()
+            return True
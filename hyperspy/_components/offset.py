@@ -43,6 +43,8 @@ class Offset(Component):
 
     """
 
+    _model_data_cacheable = True
+
     def __init__(self, offset=0.0):
         Component.__init__(self, ("offset",), ["offset"])
         self.offset.free = True
@@ -129,6 +131,11 @@ def function_nd(self, axis):
 
     function_nd.__doc__ %= FUNCTION_ND_DOCSTRING
 
+    def _gradient_nd(self, parameter, x):
+        """Returns the partial derivative of the component with respect to
+        ``parameter`` for all the indices of the parameter maps."""
+        return np.ones(self.offset.map.shape + x.shape)
+
     @property
     def _constant_term(self):
         "Get value of constant term of component"
@@ -16,7 +16,15 @@
 # You should have received a copy of the GNU General Public License
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
+import dask.array as da
+import numpy as np
+
 from hyperspy._components.expression import Expression
+from hyperspy.component import (
+    _estimate_step_parameters,
+    _get_estimation_data,
+    _linear_regression,
+)
 
 
 class RC(Expression):
@@ -66,3 +74,64 @@ def __init__(self, Vmax=1.0, V0=0.0, tau=1.0, module=None, **kwargs):
         )
 
         self.isbackground = False
+
+    def estimate_parameters(self, signal, x1, x2, only_current=False):
+        """Estimate the RC function from the step and its derivative.
+
+        ``tau`` is estimated from the centroid of the derivative, which is
+        the mean of an exponential decay, and ``V0`` and ``Vmax`` by linear
+        least squares for this value of ``tau``.
+
+        Parameters
+        ----------
+        signal : :class:`~.api.signals.Signal1D`
+        x1 : float
+            Defines the left limit of the spectral range to use for the
+            estimation.
+        x2 : float
+            Defines the right limit of the spectral range to use for the
+            estimation.
+        only_current : bool
+            If False estimates the parameters for the full dataset.
+
+        Returns
+        -------
+        bool
+
+        Examples
+        --------
+
+        >>> rc = hs.model.components1D.RC(Vmax=3, V0=1, tau=2)
+        >>> x = np.arange(0, 40, 0.1)
+        >>> s = hs.signals.Signal1D(np.tile(rc.function(x), (4, 1)))
+        >>> s.axes_manager[-1].scale = 0.1
+        >>> rc.estimate_parameters(s, 0, 40)
+        True
+        """
+        super()._estimate_parameters(signal)
+        X, data = _get_estimation_data(signal, x1, x2, only_current)
+        _, _, centre, _ = _estimate_step_parameters(signal, x1, x2, only_current)
+        # The decay is memoryless: its mean is tau after the start of the range
+        tau = np.asarray(centre - X[0])
+        V0, Vmax = _linear_regression(1 - np.exp(-X / tau[..., np.newaxis]), data)
+        if isinstance(data, da.Array):
+            V0, Vmax = da.compute(V0, Vmax)
+        if only_current is True:
+            V0, Vmax, tau = float(V0), float(Vmax), float(tau)
+
+        if only_current is True:
+            self.Vmax.value = Vmax
+            self.V0.value = V0
+            self.tau.value = tau
+            return True
+        else:
+            if self.Vmax.map is None:
+                self._create_arrays()
+            self.Vmax.map["values"][:] = Vmax
+            self.Vmax.map["is_set"][:] = True
+            self.V0.map["values"][:] = V0
+            self.V0.map["is_set"][:] = True
+            self.tau.map["values"][:] = tau
+            self.tau.map["is_set"][:] = True
+            self.fetch_stored_values()
+            return True
@@ -16,10 +16,11 @@
 # You should have received a copy of the GNU General Public License
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
+import dask.array as da
 import numpy as np
 from scipy.interpolate import make_interp_spline
 
-from hyperspy.component import Component
+from hyperspy.component import Component, _get_estimation_data
 from hyperspy.docstrings.parameters import FUNCTION_ND_DOCSTRING
 from hyperspy.ui_registry import add_gui_method
 
@@ -67,6 +68,7 @@ class ScalableFixedPattern(Component):
     Methods
     -------
     prepare_interpolator
+    estimate_parameters
 
     Examples
     --------
@@ -125,6 +127,63 @@ def prepare_interpolator(self, **kwargs):
             **kwargs,
         )
 
+    def estimate_parameters(self, signal, x1, x2, only_current=False):
+        """Estimate ``yscale`` by linear least squares.
+
+        The fixed pattern is evaluated once for the current values of
+        ``xscale`` and ``shift`` and ``yscale`` is obtained for all the
+        navigation positions at once by solving the corresponding
+        least squares problem with multiple right-hand sides.
+
+        Parameters
+        ----------
+        signal : :class:`~.api.signals.Signal1D`
+        x1 : float
+            Defines the left limit of the spectral range to use for the
+            estimation.
+        x2 : float
+            Defines the right limit of the spectral range to use for the
+            estimation.
+        only_current : bool
+            If False estimates the parameters for the full dataset.
+
+        Returns
+        -------
+        bool
+
+        Examples
+        --------
+
+        >>> pattern = hs.signals.Signal1D(np.arange(10.0))
+        >>> s = hs.signals.Signal1D(np.arange(4).reshape(4, 1) * pattern.data)
+        >>> fp = hs.model.components1D.ScalableFixedPattern(pattern)
+        >>> fp.estimate_parameters(s, 0, 10)
+        True
+        >>> fp.yscale.map["values"]
+        array([0., 1., 2., 3.])
+        """
+        super()._estimate_parameters(signal)
+        X, data = _get_estimation_data(signal, x1, x2, only_current)
+        pattern = self._function(X, self.xscale.value, 1.0, self.shift.value)
+        if not self.interpolate:
+            i1, i2 = signal.axes_manager.signal_axes[0].value_range_to_indices(x1, x2)
+            pattern = pattern[i1:i2]
+        norm = pattern @ pattern
+        yscale = data @ pattern / (norm if norm else 1)
+        if isinstance(data, da.Array):
+            yscale = yscale.compute()
+
+        if only_current is True:
+            self.yscale.value = float(yscale)
+            return True
+        else:
+            if self.yscale.map is None:
+                self._create_arrays()
+            self.yscale.map["values"][:] = yscale
+            self.yscale.map["is_set"][:] = True
+            self.fetch_stored_values()
+            return True
+
     def _function(self, x, xscale, yscale, shift):
         if self.interpolate is True:
             result = yscale * self.f(x * xscale - shift)
@@ -64,6 +64,8 @@ class SplitVoigt(Component):
 
     """
 
+    _model_data_cacheable = True
+
     def __init__(self, A=1.0, sigma1=1.0, sigma2=1.0, fraction=0.0, centre=0.0):
         Component.__init__(self, ("A", "sigma1", "sigma2", "centre", "fraction"))
         self.A.value = A
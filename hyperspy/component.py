@@ -22,7 +22,9 @@
 import numpy as np
 import sympy
 import traits.api as t
+from dask import compute
 from dask.array import Array as dArray
+from dask.array import from_array
 from rsciio.utils.tools import append2pathname, incremental_filename
 from sympy.utilities.lambdify import lambdify
 from traits.trait_numeric import Array
@@ -341,6 +343,7 @@ def _set_value(self, value):
         if self._number_of_elements != 1 and not isinstance(self.__value, tuple):
             self.__value = tuple(self.__value)
         if old_value != self.__value:
+            self._clear_model_data_cache()
             self.events.value_changed.trigger(value=self.__value, obj=self)
         self.trait_property_changed("value", old_value, self.__value)
 
@@ -364,7 +367,12 @@ def _set_free(self, arg):
             self.component._update_free_parameters()
         self.trait_property_changed("free", old_value, self._free)
 
+    def _clear_model_data_cache(self):
+        if self.component is not None:
+            self.component._model_data_cache = None
+
     def _on_twin_update(self, value, twin=None):
+        self._clear_model_data_cache()
         if (
             twin is not None
             and hasattr(twin, "events")
@@ -603,7 +611,9 @@ def as_signal(self, field="values"):
         """Get a parameter map as a signal object.
 
         Please note that this method only works when the navigation
-        dimension is greater than 0.
+        dimension is greater than 0. When the map is stored on disk (see the
+        ``maps_dir`` argument of :meth:`~hyperspy.model.BaseModel.multifit`),
+        a lazy signal is returned.
 
         Parameters
         ----------
@@ -613,9 +623,12 @@ def as_signal(self, field="values"):
         """
         from hyperspy.signal import BaseSignal
 
-        s = BaseSignal(
-            data=self.map[field], axes=self._axes_manager._get_navigation_axes_dicts()
-        )
+        data = self.map[field]
+        lazy = isinstance(data, np.memmap)
+        if lazy:
+            data = from_array(data, chunks="auto")
+        s = BaseSignal(data=data, axes=self._axes_manager._get_navigation_axes_dicts())
+        s._lazy = lazy
         if self.component is not None and self.component.active_is_multidimensional:
             s.data[np.logical_not(self.component._active_array)] = np.nan
 
@@ -763,6 +776,10 @@ class Component(t.HasTraits):
     """
 
     __axes_manager = None
+    # Whether the result of ``function`` depends only on the axis and the
+    # values of the parameters, in which case it can be cached by the model
+    _model_data_cacheable = False
+    _model_data_cache = None
     # setting dtype for t.Property(t.Bool) causes serialization error with cloudpickle
     active = t.Property()
     name = t.Property()
@@ -1409,3 +1426,116 @@ def _get_scaling_factor(signal, axis, parameter):
         scaling_factor = 1
 
     return scaling_factor
+
+
+def _get_estimation_data(signal, x1, x2, only_current):
+    """
+    Return the signal axis values and the data in the ``[x1, x2]`` range,
+    with the signal axis last, for the parameter estimators.
+
+    For binned axes, the data is divided by the bin width so that the
+    estimated amplitudes are directly comparable to the component values.
+
+    Parameters
+    ----------
+    signal : :class:`~.api.signals.Signal1D`
+    x1, x2 : float
+        The limits of the spectral range to use for the estimation.
+    only_current : bool
+        If True, only the data at the current navigation position is returned.
+
+    Returns
+    -------
+    X, data : numpy.ndarray or dask.array.Array
+    """
+    axis = signal.axes_manager.signal_axes[0]
+    i1, i2 = axis.value_range_to_indices(x1, x2)
+    X = axis.axis[i1:i2]
+    if only_current:
+        data = signal._get_current_data()[i1:i2]
+    else:
+        data = np.moveaxis(signal.data, axis.index_in_array, -1)[..., i1:i2]
+    if axis.is_binned:
+        width = axis.scale if axis.is_uniform else np.gradient(axis.axis)[i1:i2]
+        data = data / width
+    return X, data
+
+
+def _linear_regression(x, y, where=True):
+    """
+    Least squares fit of ``y = intercept + slope * x`` along the last axis,
+    vectorized over the leading axes.
+
+    Parameters
+    ----------
+    x, y : numpy.ndarray or dask.array.Array
+        Broadcastable arrays.
+    where : bool or array of bool
+        The points to include in the fit.
+
+    Returns
+    -------
+    intercept, slope : numpy.ndarray or dask.array.Array
+    """
+    n = np.sum(np.broadcast_to(where, np.broadcast_shapes(np.shape(x), y.shape)), -1)
+    n = np.where(n > 0, n, 1)
+    x_mean = np.sum(np.where(where, x, 0), -1) / n
+    y_mean = np.sum(np.where(where, y, 0), -1) / n
+    dx = np.where(where, x - x_mean[..., np.newaxis], 0)
+    dy = np.where(where, y - y_mean[..., np.newaxis], 0)
+    sxx = np.sum(dx**2, -1)
+    slope = np.sum(dx * dy, -1) / np.where(sxx > 0, sxx, 1)
+    return y_mean - slope * x_mean, slope
+
+
+def _estimate_step_parameters(signal, x1, x2, only_current):
+    """
+    Estimate the characteristics of a monotonous step in the ``[x1, x2]``
+    range for all navigation positions at once.
+
+    The levels are the averages of the first and last 5% of the range, the
+    position is the centroid of the derivative along the direction of the step
+    and the steepness is the maximum of the derivative normalised by the step
+    height.
+
+    Parameters
+    ----------
+    signal : :class:`~.api.signals.Signal1D`
+    x1, x2 : float
+        The limits of the spectral range to use for the estimation.
+    only_current : bool
+        If True, only the data at the current navigation position is used.
+
+    Returns
+    -------
+    low, step, centre, steepness : numpy.ndarray
+        The level before the step, the signed step height, the position of
+        the step and the inverse of its width. The steepness is always
+        positive, the direction of the step is given by the sign of ``step``.
+    """
+    X, data = _get_estimation_data(signal, x1, x2, only_current)
+    n = max(1, len(X) // 20)
+    low = data[..., :n].mean(-1)
+    step = data[..., -n:].mean(-1) - low
+    sign = np.where(step < 0, -1, 1)[..., np.newaxis]
+    # Derivative along the direction of the step, positive part only
+    derivative = np.clip(sign * np.diff(data, axis=-1) / np.diff(X), 0, None)
+    X_mid = (X[1:] + X[:-1]) / 2
+    weights = derivative.sum(-1)
+    valid = weights > 0
+    centre = np.where(
+        valid,
+        (X_mid * derivative).sum(-1) / np.where(valid, weights, 1),
+        X_mid.mean(),
+    )
+    steepness = np.where(
+        step != 0, derivative.max(-1) / np.where(step != 0, abs(step), 1), 0
+    )
+    # Fall back on the width of the range when no slope can be measured
+    steepness = np.where(steepness > 0, steepness, 1 / abs(X[-1] - X[0]))
+
+    if isinstance(data, dArray):
+        low, step, centre, steepness = compute(low, step, centre, steepness)
+    if only_current:
+        return float(low), float(step), float(centre), float(steepness)
+    return low, step, centre, steepness
@@ -16,9 +16,14 @@
 # You should have received a copy of the GNU General Public License
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
+import logging
+import os
+
 import dask.array as da
 import numpy as np
 
+_logger = logging.getLogger(__name__)
+
 
 def _format_string(val):
     """
@@ -185,6 +190,140 @@ def _repr_html_(self):
         return html
 
 
+class FitDiagnostics:
+    """
+    Diagnostics of the fit at each navigation position of a model.
+
+    Each attribute is a navigation signal, filled when fitting the model with
+    :meth:`~hyperspy.model.BaseModel.fit` or
+    :meth:`~hyperspy.model.BaseModel.multifit`. The number of evaluations and
+    the status are ``nan`` when they are not provided by the optimizer and
+    at the positions which have not been fitted.
+
+    Attributes
+    ----------
+    nfev : :class:`~.api.signals.BaseSignal`
+        The number of evaluations of the model.
+    njev : :class:`~.api.signals.BaseSignal`
+        The number of evaluations of the jacobian.
+    time : :class:`~.api.signals.BaseSignal`
+        The wall time of the fit, in seconds. When several positions are
+        fitted at once, the time is divided equally between them.
+    status : :class:`~.api.signals.BaseSignal`
+        The status returned by the optimizer, see its documentation.
+    success : :class:`~.api.signals.BaseSignal`
+        Whether the optimizer exited successfully.
+    at_bounds : :class:`~.api.signals.BaseSignal`
+        Whether a free parameter is at one of its bounds at the end of a
+        bounded fit.
+    """
+
+    _fields = {
+        "nfev": ("float", "number of function evaluations"),
+        "njev": ("float", "number of jacobian evaluations"),
+        "time": ("float", "fit time"),
+        "status": ("float", "optimizer status"),
+        "success": ("bool", "fit success"),
+        "at_bounds": ("bool", "parameters at bounds"),
+    }
+
+    def __init__(self, model):
+        self.model = model
+        title = model.signal.metadata.General.title
+        for name, (dtype, description) in self._fields.items():
+            data = np.zeros(model.chisq.data.shape, dtype=dtype)
+            if dtype == "float":
+                data.fill(np.nan)
+            signal = model.chisq._deepcopy_with_new_data(data)
+            signal.metadata.General.title = f"{title} {description}"
+            setattr(self, name, signal)
+
+    @property
+    def _signals(self):
+        return [getattr(self, name) for name in self._fields]
+
+    def _store(self, index, fit_output=None, time=np.nan, at_bounds=False):
+        """Store the diagnostics of a fit at the given navigation index.
+
+        Parameters
+        ----------
+        index : tuple
+            The navigation index in array order. Advanced indexing can be
+            used to store the diagnostics of several positions at once.
+        fit_output : dict or None
+            The output of the optimizer, the values of the ``nfev``, ``njev``,
+            ``status`` and ``success`` keys are stored if present. For
+            several positions, the values can be arrays.
+        time : float or numpy.ndarray
+            The wall time of the fit of each position.
+        at_bounds : bool or numpy.ndarray
+            Whether a free parameter is at one of its bounds.
+        """
+        fit_output = {} if fit_output is None else fit_output
+        self.nfev.data[index] = fit_output.get("nfev", np.nan)
+        self.njev.data[index] = fit_output.get("njev", np.nan)
+        self.status.data[index] = fit_output.get("status", np.nan)
+        self.success.data[index] = fit_output.get("success", False)
+        self.time.data[index] = time
+        self.at_bounds.data[index] = at_bounds
+
+    def summary(self):
+        """Return a summary of the diagnostics of the fitted positions.
+
+        Returns
+        -------
+        str
+        """
+        time = self.time.data
+        fitted = ~np.isnan(time)
+        n_fitted = int(fitted.sum())
+        lines = [
+            f"Fit diagnostics: {self.model.signal.metadata.General.title}",
+            f"Fitted positions: {n_fitted} / {time.size}",
+        ]
+        if n_fitted:
+            n_failed = int((~self.success.data[fitted]).sum())
+            n_at_bounds = int(self.at_bounds.data[fitted].sum())
+            times = time[fitted]
+            lines.extend(
+                [
+                    f"Total time: {times.sum():.4g} s",
+                    "Time per position: "
+                    f"mean {times.mean():.4g} s, median {np.median(times):.4g} s, "
+                    f"max {times.max():.4g} s",
+                ]
+            )
+            for name in ["nfev", "njev"]:
+                values = getattr(self, name).data[fitted]
+                values = values[~np.isnan(values)]
+                if values.size:
+                    lines.append(
+                        f"{name}: mean {values.mean():.4g}, max {values.max():.4g}"
+                    )
+            lines.extend(
+                [
+                    f"Unsuccessful fits: {n_failed} ({n_failed / n_fitted:.1%})",
+                    f"Fits with parameters at bounds: {n_at_bounds} "
+                    f"({n_at_bounds / n_fitted:.1%})",
+                ]
+            )
+            # Navigation indices of the slowest positions
+            slowest = np.argsort(np.where(fitted, time, -np.inf), axis=None)[::-1]
+            slowest = [
+                np.unravel_index(i, time.shape)[::-1]
+                for i in slowest[:5]
+                if fitted.flat[i]
+            ]
+            lines.append(
+                "Slowest positions: "
+                + ", ".join(str(tuple(int(j) for j in i)) for i in slowest)
+            )
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return self.summary()
+
+
 def _calculate_covariance(
     target_signal, coefficients, component_data, residual=None, lazy=False
 ):
@@ -237,3 +376,267 @@ def _calculate_covariance(
     k = coefficients.shape[-1]  # the number of components
     covariance = (1 / (n - k)) * (residual * inv_fit_dot.T).T
     return covariance
+
+
+def _batched_levenberg_marquardt(
+    fun,
+    jac,
+    p0,
+    bounds=None,
+    ftol=1.49012e-08,
+    xtol=1.49012e-08,
+    maxfev=None,
+):
+    """
+    Levenberg-Marquardt least-squares minimisation of a batch of independent
+    problems sharing the same model.
+
+    All problems are updated together: the residuals and the Jacobian are
+    evaluated for every problem of the batch which has not converged yet in
+    a single call and the damped normal equations are solved with a stacked
+    :func:`numpy.linalg.solve`.
+
+    Parameters
+    ----------
+    fun : callable
+        ``fun(p, rows)`` returns the residuals, shape ``(len(rows), M)``, of
+        the problems ``rows`` for the parameters ``p``, shape
+        ``(len(rows), C)``.
+    jac : callable
+        ``jac(p, rows, residuals)`` returns the Jacobian of the residuals,
+        shape ``(len(rows), M, C)``.
+    p0 : numpy.ndarray, shape (K, C)
+        The starting values of the parameters of each problem.
+    bounds : None or tuple of array-like
+        Lower and upper bounds, each of shape ``(C,)``. The parameters are
+        projected on the bounds after each step.
+    ftol, xtol : float
+        Relative tolerance on the cost and on the parameters, as in
+        :func:`scipy.optimize.leastsq`.
+    maxfev : int or None
+        Maximum number of function evaluations of each problem. If None,
+        ``200 * (C + 1)``, as in :func:`scipy.optimize.leastsq`.
+
+    Returns
+    -------
+    dict
+        With the fields ``x`` (K, C), ``fun`` (K, M), ``jac`` (K, M, C),
+        ``cost`` (K,), ``nfev`` (K,), ``njev`` (K,), ``status`` (K,) and
+        ``success`` (K,). ``status`` is 1 when the cost converged, 2 when the
+        parameters converged, 5 when ``maxfev`` was reached and 0 when the
+        damping factor diverged.
+
+    Notes
+    -----
+    Explanation of the array shapes in HyperSpy terms:
+    K : number of navigation positions in the batch
+    M : flattened signal shape
+    C : number of free parameters
+    """
+    p = np.array(p0, dtype=float, copy=True)
+    n_problems, n_parameters = p.shape
+    if maxfev is None:
+        maxfev = 200 * (n_parameters + 1)
+    if bounds is not None:
+        lower, upper = (np.asarray(b, dtype=float) for b in bounds)
+        p = np.clip(p, lower, upper)
+
+    all_rows = np.arange(n_problems)
+    r = fun(p, all_rows)
+    J = jac(p, all_rows, r)
+    cost = np.einsum("km,km->k", r, r)
+    nfev = np.ones(n_problems, dtype=int)
+    njev = np.ones(n_problems, dtype=int)
+    status = np.zeros(n_problems, dtype=int)
+    damping = np.full(n_problems, 1e-3)
+    # Nothing to do for the problems which are already solved exactly
+    status[cost == 0] = 1
+    running = status == 0
+    eye = np.eye(n_parameters)
+
+    while running.any():
+        rows = all_rows[running]
+        Jr = J[rows]
+        JTJ = np.matmul(Jr.swapaxes(-2, -1), Jr)
+        JTr = np.einsum("kmc,km->kc", Jr, r[rows])
+        diag = np.diagonal(JTJ, axis1=-2, axis2=-1).copy()
+        # Avoid singular systems when a parameter has no effect on the model
+        diag[diag == 0] = 1.0
+        A = JTJ + damping[rows, None, None] * diag[:, :, None] * eye
+        try:
+            step = -np.linalg.solve(A, JTr[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            step = -(np.linalg.pinv(A) @ JTr[..., None])[..., 0]
+        p_new = p[rows] + step
+        if bounds is not None:
+            p_new = np.clip(p_new, lower, upper)
+            step = p_new - p[rows]
+        r_new = fun(p_new, rows)
+        cost_new = np.einsum("km,km->k", r_new, r_new)
+        nfev[rows] += 1
+
+        improved = cost_new < cost[rows]
+        cost_converged = improved & (
+            (cost[rows] - cost_new) <= ftol * np.maximum(cost[rows], 1e-300)
+        )
+        step_norm = np.linalg.norm(step, axis=-1)
+        p_norm = np.linalg.norm(p[rows], axis=-1)
+        x_converged = step_norm <= xtol * (p_norm + xtol)
+
+        accepted = rows[improved]
+        p[accepted] = p_new[improved]
+        r[accepted] = r_new[improved]
+        cost[accepted] = cost_new[improved]
+        damping[accepted] = np.maximum(damping[accepted] / 10.0, 1e-15)
+        damping[rows[~improved]] *= 10.0
+        if accepted.size:
+            J[accepted] = jac(p[accepted], accepted, r[accepted])
+            njev[accepted] += 1
+
+        status[rows[x_converged]] = 2
+        status[rows[cost_converged]] = 1
+        diverged = damping[rows] > 1e16
+        exhausted = (nfev[rows] >= maxfev) & (status[rows] == 0) & ~diverged
+        status[rows[exhausted]] = 5
+        running[rows[(status[rows] > 0) | diverged]] = False
+
+    return {
+        "x": p,
+        "fun": r,
+        "jac": J,
+        "cost": cost,
+        "nfev": nfev,
+        "njev": njev,
+        "status": status,
+        "success": np.isin(status, (1, 2)),
+    }
+
+
+class _MultifitCheckpoint:
+    """Append-only checkpoint of the results of
+    :meth:`~hyperspy.model.BaseModel.multifit`.
+
+    The navigation positions fitted since the last flush are recorded with
+    :meth:`add` and :meth:`flush` appends their parameter values and standard
+    deviations, ``chisq`` and ``dof`` to the file. The file contains a header
+    identifying the parameters of the model, followed by pairs of ``.npy``
+    records: the flat navigation indices and the corresponding results.
+
+    Parameters
+    ----------
+    model : :class:`~hyperspy.model.BaseModel`
+        The model being fitted.
+    filename : str
+        The path of the checkpoint file.
+    """
+
+    def __init__(self, model, filename):
+        self.model = model
+        self.filename = filename
+        self._nav_shape = tuple(model.axes_manager._navigation_shape_in_array)
+        self._pending = []
+
+    @property
+    def _parameters(self):
+        return [p for c in self.model for p in c.parameters]
+
+    def _header(self):
+        return np.array(
+            [
+                f"{i}_{component.name}.{parameter.name}"
+                f"[{parameter._number_of_elements}]"
+                for i, component in enumerate(self.model)
+                for parameter in component.parameters
+            ]
+        )
+
+    def _navigation_index(self, indices):
+        if not self._nav_shape:
+            return ()
+        return np.unravel_index(indices, self._nav_shape)
+
+    def add(self, indices):
+        """Record the flat navigation indices of fitted positions."""
+        self._pending.append(np.ravel(indices).astype(np.int64))
+
+    def flush(self):
+        """Append the results at the positions recorded since the last flush
+        to the checkpoint file."""
+        if not self._pending:
+            return
+        indices = np.unique(np.concatenate(self._pending))
+        self._pending = []
+        index = self._navigation_index(indices)
+        columns = []
+        for field in ["values", "std"]:
+            for parameter in self._parameters:
+                columns.append(
+                    np.reshape(parameter.map[field][index], (indices.size, -1))
+                )
+        for signal in [self.model.chisq, self.model.dof]:
+            columns.append(np.reshape(signal.data[index], (indices.size, 1)))
+        record = np.concatenate(columns, axis=1).astype(float)
+        with open(self.filename, "ab") as f:
+            if f.tell() == 0:
+                np.save(f, self._header())
+            np.save(f, indices)
+            np.save(f, record)
+
+    def load(self):
+        """Load the results stored in the checkpoint file in the parameter
+        maps, ``chisq`` and ``dof`` of the model.
+
+        A record truncated, for example because the fit was interrupted while
+        writing it, is discarded and removed from the file.
+
+        Returns
+        -------
+        numpy.ndarray of int
+            The flat navigation indices of the positions stored in the file.
+        """
+        parameters = self._parameters
+        sizes = [p._number_of_elements for p in parameters]
+        loaded = []
+        with open(self.filename, "r+b") as f:
+            header = np.load(f)
+            if not np.array_equal(header, self._header()):
+                raise ValueError(
+                    f"The checkpoint file {self.filename} doesn't match the "
+                    "components and parameters of the model."
+                )
+            file_size = os.fstat(f.fileno()).st_size
+            while True:
+                offset = f.tell()
+                if offset == file_size:
+                    break
+                try:
+                    indices = np.load(f)
+                    record = np.load(f)
+                    if record.shape != (indices.size, 2 * sum(sizes) + 2):
+                        raise ValueError("Inconsistent record.")
+                except (ValueError, EOFError, OSError):
+                    _logger.warning(
+                        f"Discarding an incomplete record of the checkpoint "
+                        f"file {self.filename}."
+                    )
+                    f.truncate(offset)
+                    break
+                loaded.append(indices)
+                index = self._navigation_index(indices)
+                columns = np.split(
+                    record, np.cumsum(sizes + sizes + [1, 1])[:-1], axis=1
+                )
+                for i, parameter in enumerate(parameters):
+                    for field, column in zip(
+                        ["values", "std"], [columns[i], columns[i + len(sizes)]]
+                    ):
+                        target = parameter.map[field]
+                        target[index] = column.reshape(target[index].shape)
+                    parameter.map["is_set"][index] = True
+                for signal, column in zip(
+                    [self.model.chisq, self.model.dof], columns[-2:]
+                ):
+                    signal.data[index] = column.reshape(signal.data[index].shape)
+        if loaded:
+            return np.unique(np.concatenate(loaded))
+        return np.array([], dtype=np.int64)
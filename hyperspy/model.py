@@ -21,7 +21,15 @@
 import logging
 import os
 import tempfile
+import time
 import warnings
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
 from contextlib import contextmanager
 from functools import partial
 
@@ -56,7 +64,12 @@
     reconstruct_object,
 )
 from hyperspy.misc.machine_learning import import_sklearn
-from hyperspy.misc.model_tools import CurrentModelValues, _calculate_covariance
+from hyperspy.misc.model_tools import (
+    CurrentModelValues,
+    _batched_levenberg_marquardt,
+    _calculate_covariance,
+    _MultifitCheckpoint,
+)
 from hyperspy.misc.slicing import copy_slice_from_whitelist
 from hyperspy.misc.utils import (
     display,
@@ -165,6 +178,52 @@ def reconstruct_component(comp_dictionary, **init_args):
     return _class(**init_args)
 
 
+def _multifit_chunk(
+    model,
+    mask=None,
+    fetch_only_fixed=False,
+    iterpath=None,
+    binned=None,
+    compile_backend=None,
+    **kwargs,
+):
+    """Fit a chunk of the navigation space, used by
+    :meth:`BaseModel.multifit` when fitting in parallel.
+
+    Parameters
+    ----------
+    model : :class:`BaseModel` or dict
+        The model of the chunk or, when the chunk is sent to another process,
+        the dictionary of its signal with the model stored as ``"chunk"``.
+    binned : bool or None
+        The value of the ``_binned`` attribute of the model.
+    compile_backend : str or None
+        If not None, the model is compiled with this backend, see
+        :meth:`~hyperspy.models.model1d.Model1D.compile`.
+    mask, fetch_only_fixed, iterpath, **kwargs
+        See :meth:`BaseModel.multifit`.
+
+    Returns
+    -------
+    tuple
+        The parameter maps of each component, chisq and dof arrays and the
+        arrays of the fit diagnostics.
+    """
+    if isinstance(model, dict):
+        signal = BaseSignal(**model)
+        signal._assign_subclass()
+        model = signal.models.restore("chunk")
+    if compile_backend is not None:
+        model.compile(backend=compile_backend)
+    model._binned = binned
+    model._multifit_iterate(
+        mask=mask, fetch_only_fixed=fetch_only_fixed, iterpath=iterpath, **kwargs
+    )
+    maps = [[parameter.map for parameter in c.parameters] for c in model]
+    diagnostics = [signal.data for signal in model.fit_diagnostics._signals]
+    return maps, model.chisq.data, model.dof.data, diagnostics
+
+
 class ModelComponents(object):
     """Container for model components.
 
@@ -225,6 +284,7 @@ class BaseModel(list):
     chisq : :class:`~.api.signals.BaseSignal`
     red_chisq : :class:`~.api.signals.BaseSignal`
     dof : :class:`~.api.signals.BaseSignal`
+    fit_diagnostics : :class:`~.misc.model_tools.FitDiagnostics`
     components : :class:`~.model.ModelComponents`
 
     Methods
@@ -340,6 +400,14 @@ def dof(self):
         """Degrees of freedom of the signal (0 if not yet fit)"""
         return self._dof
 
+    @property
+    def fit_diagnostics(self):
+        """Diagnostics of the fit at each navigation position: number of
+        function and jacobian evaluations, fit time, optimizer status, success
+        and whether the parameters are at their bounds. Print it to get a
+        summary."""
+        return self._fit_diagnostics
+
     @property
     def components(self):
         """The components of the model are attributes of this class.
@@ -599,6 +667,9 @@ def as_signal(
         """Returns a recreation of the dataset using the model.
 
         By default, the signal range outside of the fitted range is filled with nans.
+        The components implementing ``function_nd`` are evaluated for many
+        navigation positions at once, which is much faster than iterating
+        over the navigation positions as done for the other components.
 
         Parameters
         ----------
@@ -635,6 +706,11 @@ def as_signal(
         if show_progressbar is None:
             show_progressbar = preferences.General.show_progressbar
 
+        if out is None and self.signal._lazy and self._maps_on_disk:
+            return self._as_signal_lazy(
+                component_list=component_list, out_of_range_to_nan=out_of_range_to_nan
+            )
+
         if out is None:
             data = np.empty(self.signal.data.shape, dtype="float")
             data.fill(np.nan)
@@ -655,7 +731,7 @@ def as_signal(
             channel_switches_backup = copy.copy(self._channel_switches)
             self._channel_switches[:] = True
 
-        self._as_signal_iter(
+        self._as_signal_data(
             component_list=component_list, show_progressbar=show_progressbar, data=data
         )
 
@@ -667,6 +743,119 @@ def as_signal(
 
     as_signal.__doc__ %= SHOW_PROGRESSBAR_ARG
 
+    def _as_signal_lazy(self, component_list=None, out_of_range_to_nan=True):
+        """Returns a lazy recreation of the dataset using the model, computed
+        chunk by chunk following the navigation chunks of the signal."""
+        nav_dim = self.axes_manager.navigation_dimension
+        data = self.signal.data
+        chunks = data.chunks[:nav_dim] + tuple((n,) for n in data.shape[nav_dim:])
+        if component_list:
+            # Components are given by index to the model of each chunk
+            component_list = [
+                self.index(self._get_component(x)) for x in component_list
+            ]
+
+        def _model_chunk(block_info=None):
+            location = block_info[None]["array-location"][:nav_dim]
+            sub_model = self.inav[tuple(slice(*loc) for loc in location)[::-1]]
+            if not out_of_range_to_nan:
+                sub_model._channel_switches[:] = True
+            sub_data = np.full(block_info[None]["chunk-shape"], np.nan)
+            sub_model._as_signal_data(
+                data=sub_data, component_list=component_list, show_progressbar=False
+            )
+            return sub_data
+
+        signal = self.signal.__class__(
+            da.map_blocks(_model_chunk, chunks=chunks, dtype="float"),
+            axes=self.signal.axes_manager._get_axes_dicts(),
+        )
+        signal.set_signal_type(signal.metadata.Signal.signal_type)
+        signal.metadata.General.title = (
+            self.signal.metadata.General.title + " from fitted model"
+        )
+        return signal
+
+    def _as_signal_data(self, data, component_list=None, show_progressbar=None):
+        """Fill ``data`` with the model, evaluating the components implementing
+        ``function_nd`` for many navigation positions at once and iterating
+        over the navigation positions for the other components."""
+        with stash_active_state(self if component_list else []):
+            if component_list:
+                component_list = [self._get_component(x) for x in component_list]
+                for component_ in self:
+                    if component_.active_is_multidimensional:
+                        if component_ in component_list:
+                            continue  # Keep active_map
+                        component_.active_is_multidimensional = False
+                    component_.active = component_ in component_list
+            components = [c for c in self if c.active_is_multidimensional or c.active]
+
+            try:
+                convolved = self.convolved
+            except NotImplementedError:
+                convolved = False
+            if (
+                not self.axes_manager.navigation_dimension
+                or convolved
+                or type(self)._get_model_data_nd is BaseModel._get_model_data_nd
+            ):
+                components_nd = []
+            else:
+                components_nd = [c for c in components if hasattr(c, "function_nd")]
+
+            if not components_nd:
+                self._as_signal_iter(
+                    data,
+                    component_list=component_list,
+                    show_progressbar=show_progressbar,
+                )
+                return
+            components_iter = [c for c in components if c not in components_nd]
+            if components_iter:
+                self._as_signal_iter(
+                    data, component_list=components_iter, show_progressbar=False
+                )
+            self._as_signal_nd(
+                data,
+                component_list=components_nd,
+                show_progressbar=show_progressbar,
+                add=bool(components_iter),
+            )
+
+    def _as_signal_nd(self, data, component_list, show_progressbar=None, add=False):
+        """Fill ``data`` with the model of the components of ``component_list``
+        using their ``function_nd`` method, by chunks of navigation positions.
+        If ``add`` is True, the model is added to ``data`` instead."""
+        nav_shape = self.axes_manager._navigation_shape_in_array
+        nav_size = int(np.prod(nav_shape, dtype=int))
+        channels = np.where(self._channel_switches.ravel())[0]
+        # Limit the size of the arrays evaluated at once
+        chunk_size = max(1, 2**21 // max(channels.size, 1))
+
+        with progressbar(
+            total=nav_size, disable=not show_progressbar, leave=True
+        ) as pbar:
+            for start in range(0, nav_size, chunk_size):
+                indices = np.arange(start, min(start + chunk_size, nav_size))
+                maps = self._get_parameter_maps(indices)
+                active_arrays = {
+                    c: c._active_array.ravel()[indices]
+                    for c in component_list
+                    if c.active_is_multidimensional
+                }
+                with self._swap_parameter_maps(maps):
+                    with self._swap_active_arrays(active_arrays):
+                        model_data = self._get_model_data_nd(component_list)
+                index = tuple(
+                    i[:, np.newaxis] for i in np.unravel_index(indices, nav_shape)
+                ) + (channels,)
+                if add:
+                    data[index] += model_data
+                else:
+                    data[index] = model_data
+                pbar.update(indices.size)
+
     def _as_signal_iter(self, data, component_list=None, show_progressbar=None):
         # BUG: with lazy signal returns lazy signal with numpy array
         # Note that show_progressbar can be an int to determine the progressbar
@@ -894,6 +1083,17 @@ def _bounds_as_tuple(self, transpose):
         else:
             return bounds
 
+    def _free_parameters_at_bounds(self):
+        """Return True if the value of any free parameter of the active
+        components is at one of its bounds."""
+        for component in self.active_components:
+            for parameter in component.free_parameters:
+                value = np.ravel(parameter.value)
+                for bound in [parameter.bmin, parameter.bmax]:
+                    if bound is not None and np.any(np.isclose(value, bound)):
+                        return True
+        return False
+
     def _set_mpfit_parameters_info(self, bounded=True):
         """Generate the boundary list for mpfit.
 
@@ -1045,6 +1245,97 @@ def _fetch_values_from_p0(self, p_std=None):
                 )
                 counter += component._nfree_param
 
+    def _get_parameter_maps(self, indices, only_fixed=False):
+        """Get a copy of the parameter maps of all the components at the given
+        navigation indices, filling the values which have not been stored with
+        the current values of the parameters, similarly to
+        :meth:`fetch_stored_values`.
+
+        Parameters
+        ----------
+        indices : numpy.ndarray of int
+            The flat indices of the navigation positions.
+        only_fixed : bool, optional
+            If True, the current values are used for the free parameters.
+
+        Returns
+        -------
+        dict
+            The parameters as keys and the structured arrays of the maps at
+            the given indices, of shape ``(len(indices),)``, as values.
+        """
+        maps = {}
+        for component in self:
+            for parameter in component.parameters:
+                map_ = parameter.map[np.unravel_index(indices, parameter.map.shape)]
+                if only_fixed and parameter.free:
+                    map_["is_set"] = False
+                map_["values"][~map_["is_set"]] = parameter.value
+                maps[parameter] = map_
+        self._set_twinned_values_in_maps(maps)
+        return maps
+
+    @staticmethod
+    def _set_twinned_values_in_maps(maps):
+        """Set the values of the twinned parameters in the given parameter
+        maps from the values of their twin."""
+
+        def twinned_values(parameter):
+            if parameter.twin is None:
+                return maps[parameter]["values"]
+            values = twinned_values(parameter.twin)
+            if parameter._twin_function is not None:
+                values = parameter._twin_function(values)
+            return values
+
+        for parameter in maps:
+            if parameter.twin is not None and parameter.twin in maps:
+                maps[parameter]["values"] = twinned_values(parameter)
+
+    @contextmanager
+    def _swap_parameter_maps(self, maps):
+        """Context manager to temporarily replace the ``map`` of the parameters
+        by the given arrays, for example to evaluate the ``function_nd`` of the
+        components for a subset of the navigation positions."""
+        old_maps = {parameter: parameter.map for parameter in maps}
+        try:
+            for parameter, map_ in maps.items():
+                parameter.map = map_
+            yield
+        finally:
+            for parameter, map_ in old_maps.items():
+                parameter.map = map_
+
+    @contextmanager
+    def _swap_active_arrays(self, active_arrays):
+        """Context manager to temporarily replace the ``_active_array`` of the
+        components by the given arrays, similarly to
+        :meth:`_swap_parameter_maps`."""
+        old_arrays = {c: c._active_array for c in active_arrays}
+        try:
+            for component, array in active_arrays.items():
+                component._active_array = array
+            yield
+        finally:
+            for component, array in old_arrays.items():
+                component._active_array = array
+
+    def _get_model_data_nd(self, component_list=None):
+        """Evaluate the model for all the navigation indices of the parameter
+        maps. Implementation requested in all sub-classes"""
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support the evaluation of "
+            "the model for several navigation positions at once."
+        )
+
+    def _get_jacobian_nd(self, parameters):
+        """Evaluate the jacobian of the model for all the navigation indices
+        of the parameter maps. Implementation requested in all sub-classes"""
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support the evaluation of "
+            "the jacobian for several navigation positions at once."
+        )
+
     def _model2plot(self, axes_manager, out_of_range2nans=True):
         old_axes_manager = None
         if axes_manager is not self.axes_manager:
@@ -1062,6 +1353,11 @@ def _model2plot(self, axes_manager, out_of_range2nans=True):
             s = ns
         return s
 
+    def _check_compiled_model(self):
+        """Update the compiled model functions used when fitting. Does nothing
+        for models which can't be compiled."""
+        pass
+
     def _model_function(self, param):
         self.p0 = param
         self._fetch_values_from_p0()
@@ -1088,6 +1384,7 @@ def _linear_fit(
         calculate_errors=False,
         only_current=True,
         weights=None,
+        navigation_indices=None,
         **kwargs,
     ):
         """
@@ -1114,6 +1411,12 @@ def _linear_fit(
             If True, calculate the errors.
         only_current : bool, default is True
             Fit the current index only, instead of the whole navigation space.
+        navigation_indices : None or numpy.ndarray of int, default None
+            Only used when ``only_current`` is False. If not None, only the
+            navigation positions given by these flat indices of the navigation
+            array are fitted, using the component data of the current
+            position, and the results are returned in the same order instead
+            of being reshaped to the navigation shape.
         kwargs : dict, optional
             Keyword arguments are passed to the corresponding optimizer.
 
@@ -1255,7 +1558,10 @@ def _linear_fit(
             nav_shape = self.axes_manager._navigation_shape_in_array
             target_signal = self.signal.data.reshape(
                 (np.prod(nav_shape, dtype=int),) + (np.prod(sig_shape, dtype=int),)
-            )[:, _channel_switches]
+            )
+            if navigation_indices is not None:
+                target_signal = target_signal[navigation_indices]
+            target_signal = target_signal[:, _channel_switches]
 
         if any([ax.is_binned for ax in signal_axes]):
             target_signal = target_signal / np.prod(
@@ -1339,7 +1645,7 @@ def _linear_fit(
             fit_output["covar"] = covariance
             fit_output["perror"] = abs(fit_output["x"]) * std_error
 
-        if not only_current:
+        if not only_current and navigation_indices is None:
             # The nav shape will have been flattened. We reshape it here.
             fit_output["x"] = fit_output["x"].reshape(nav_shape + (n_parameters,))
 
@@ -1492,7 +1798,9 @@ def fit(
         The chi-squared and reduced chi-squared statistics, and the
         degrees of freedom, are computed automatically when fitting,
         only when ``loss_function="ls"``. They are stored as signals:
-        ``chisq``, ``red_chisq`` and ``dof``.
+        ``chisq``, ``red_chisq`` and ``dof``. The number of function
+        evaluations, the fit time and the status of the optimizer are
+        stored in ``fit_diagnostics``.
 
         If the attribute ``metada.Signal.Noise_properties.variance``
         is defined as a ``Signal`` instance with the same
@@ -1512,6 +1820,7 @@ def fit(
         multifit, fit
 
         """
+        start_time = time.perf_counter()
         cm = (
             self.suspend_update
             if (update_plot != self._plot_active) and not update_plot
@@ -1607,6 +1916,8 @@ def fit(
             )
             grad = jac
 
+        self._check_compiled_model()
+
         # Check validity of grad and fd_scheme arguments
         if grad == "analytical":
             _has_gradient, _jac_err_msg = self._check_analytical_jacobian()
@@ -1823,9 +2134,18 @@ def _wrap_jac(*args, **kwargs):
                 )
                 self.fit_output = OptimizeResult(**fit_output)
 
+                navigation_indices = kwargs.get("navigation_indices")
                 if only_current:
                     # fit_output will have only one entry
                     indices = ()
+                elif navigation_indices is not None:
+                    # fit_output is ordered as `navigation_indices`
+                    current = np.ravel_multi_index(
+                        self.axes_manager.indices[::-1],
+                        self.axes_manager._navigation_shape_in_array,
+                    )
+                    position = np.flatnonzero(navigation_indices == current)
+                    indices = (position[0] if position.size else 0,)
                 else:
                     indices = self.axes_manager.indices[::-1]
 
@@ -1890,6 +2210,12 @@ def _wrap_jac(*args, **kwargs):
 
             self._calculate_chisq()
             self._set_current_degrees_of_freedom()
+            self.fit_diagnostics._store(
+                self.axes_manager.indices[::-1],
+                self.fit_output,
+                time=time.perf_counter() - start_time,
+                at_bounds=bounded and self._free_parameters_at_bounds(),
+            )
 
             if bounded:
                 self._disable_ext_bounding()
@@ -1929,6 +2255,11 @@ def multifit(
         show_progressbar=None,
         interactive_plot=False,
         iterpath=None,
+        batch_size=None,
+        num_workers=None,
+        scheduler="processes",
+        maps_dir=None,
+        resume=None,
         **kwargs,
     ):
         """Fit the data to the model at all positions of the navigation dimensions.
@@ -1942,9 +2273,14 @@ def multifit(
         fetch_only_fixed : bool, default False
             If True, only the fixed parameters values will be updated
             when changing the positon.
-        autosave : bool, default False
+        autosave : bool or str, default False
             If True, the result of the fit will be saved automatically
-            with a frequency defined by autosave_every.
+            with a frequency defined by autosave_every to a temporary
+            checkpoint file, which is deleted when the fit finishes. If a
+            string, the path of the checkpoint file, which is kept when the
+            fit finishes and can be used to resume the fit with ``resume``.
+            Only the results at the positions fitted since the previous save
+            are appended to the checkpoint file.
         autosave_every : int, default 10
             Save the result of fitting every given number of spectra.
         %s
@@ -1962,6 +2298,57 @@ def multifit(
                 Works for n-dimensional navigation space, not just 2D.
             If None:
                 Use the value of :attr:`~.axes.AxesManager.iterpath`.
+        batch_size : None or int, default None
+            If not None, fit ``batch_size`` navigation positions at once using
+            a vectorized Levenberg-Marquardt optimizer, which evaluates the
+            model and its jacobian for all the positions of the batch
+            together. This is much faster than fitting the navigation
+            positions one by one when the fit of a single position is
+            dominated by the overhead of evaluating the model. Only
+            ``optimizer="lm"``, ``loss_function="ls"`` and components
+            implementing ``function_nd`` are supported. Since all the
+            positions of a batch are fitted together, the result of the fit
+            at one position is not used as starting values of the next
+            position and ``iterpath`` is ignored: the starting values are the
+            stored values, if set, otherwise the current values. The
+            ``ftol``, ``xtol`` and ``maxfev`` keyword arguments of
+            :func:`scipy.optimize.leastsq` are supported.
+        num_workers : None or int, default None
+            If not None, the navigation space is split in ``num_workers``
+            chunks along the slowest navigation axis and the chunks are fitted
+            in parallel using ``num_workers`` workers. Inside each chunk, the
+            navigation positions are fitted one by one following ``iterpath``
+            and the result of the fit at one position is used as starting
+            values of the next one. The first position of each chunk starts
+            from the current values of the parameters. This is only used when
+            the dataset is fitted by iterating over the navigation positions,
+            i.e. not when fitting in a vectorized fashion or in batches.
+            The ``interactive_plot`` argument is ignored when fitting in
+            parallel.
+        scheduler : {``"processes"``, ``"threads"``}, default ``"processes"``
+            The pool of workers used when ``num_workers`` is not None. Using
+            ``"threads"`` avoids the cost of sending the chunks of the model to
+            other processes but is only efficient if the optimizer releases
+            the global interpreter lock.
+        maps_dir : None or str, default None
+            If not None, the parameter maps, ``chisq``, ``dof`` and
+            ``fit_diagnostics`` arrays are memory-mapped to ``.npy`` files in the ``maps_dir`` directory, so
+            that they don't need to fit in memory, and the dataset is fitted
+            chunk by chunk, following the chunks of the data of lazy signals.
+            Only the data of one chunk (or ``num_workers`` chunks when
+            fitting in parallel) is loaded in memory at once and the results
+            are written to disk as the fit progresses. As when fitting in
+            parallel, the first position of each chunk starts from the current
+            values of the parameters. :meth:`as_signal` and
+            :meth:`~hyperspy.component.Parameter.as_signal` return lazy
+            signals reading from these files.
+        resume : None or str, default None
+            The path of a checkpoint file written using ``autosave``, for
+            example by a fit which has been interrupted. The results stored in
+            the checkpoint file are loaded in the parameter maps, the
+            corresponding navigation positions are not fitted again and the
+            results of the fit of the remaining positions are appended to the
+            checkpoint file.
         **kwargs : dict
             Any extra keyword argument will be passed to the fit method.
             See the documentation for :meth:`~hyperspy.model.BaseModel.fit`
@@ -1979,16 +2366,21 @@ def multifit(
         if show_progressbar is None:
             show_progressbar = preferences.General.show_progressbar
 
-        if autosave:
+        if resume is not None and not autosave:
+            autosave = resume
+        if autosave is True:
             fd, autosave_fn = tempfile.mkstemp(
-                prefix="hyperspy_autosave-", dir=".", suffix=".npz"
+                prefix="hyperspy_autosave-", dir=".", suffix=".checkpoint"
             )
             os.close(fd)
-            autosave_fn = autosave_fn[:-4]
             _logger.info(
-                f"Autosaving every {autosave_every} pixels to {autosave_fn}.npz. "
+                f"Autosaving every {autosave_every} pixels to {autosave_fn}. "
                 "When multifit finishes, this file will be deleted."
             )
+        elif autosave:
+            autosave_fn = autosave
+            _logger.info(f"Autosaving every {autosave_every} pixels to {autosave_fn}.")
+        checkpoint = _MultifitCheckpoint(self, autosave_fn) if autosave else None
 
         if mask is not None and (
             mask.shape != tuple(self.axes_manager._navigation_shape_in_array)
@@ -1997,6 +2389,14 @@ def multifit(
                 "The mask must be a numpy array of boolean type with "
                 f"shape: {self.axes_manager._navigation_shape_in_array}"
             )
+        if maps_dir is not None:
+            self._store_maps_on_disk(maps_dir)
+        if resume is not None:
+            fitted = _MultifitCheckpoint(self, resume).load()
+            _logger.info(f"Resuming the fit, {fitted.size} positions already fitted.")
+            fitted_mask = np.zeros(self.axes_manager._navigation_shape_in_array, bool)
+            fitted_mask.flat[fitted] = True
+            mask = fitted_mask if mask is None else mask | fitted_mask
         linear_fitting = kwargs.get("optimizer", "") in [
             "lstsq",
             "ols",
@@ -2022,6 +2422,65 @@ def multifit(
         except NotImplementedError:
             convolved = False
 
+        # Fitting in batches is irrelevant without navigation dimension
+        if batch_size is not None and self.axes_manager.navigation_dimension:
+            if linear_fitting:
+                raise ValueError(
+                    "`batch_size` is not supported with linear optimizers, "
+                    "which already fit the whole dataset at once when "
+                    "possible."
+                )
+            active_is_multidimensional = [
+                c
+                for c in self
+                if c.active_is_multidimensional
+                and np.any(c._active_array != c._active_array.flat[0])
+            ]
+            missing_function_nd = [
+                c for c in self.active_components if not hasattr(c, "function_nd")
+            ]
+            if len(active_is_multidimensional) > 0:
+                warnings.warn(
+                    "The model contains components whose active state varies "
+                    "across the navigation indices, which is not supported "
+                    "when fitting the dataset in batches. Fitting proceeds by "
+                    "iterating over the navigation dimensions, which is "
+                    "significantly slower.\n"
+                    "These components are:\n\t"
+                    + "\n\t".join(str(c) for c in active_is_multidimensional)
+                )
+            elif len(missing_function_nd) > 0:
+                warnings.warn(
+                    "The model contains components which don't implement "
+                    "`function_nd`, which is required when fitting the "
+                    "dataset in batches. Fitting proceeds by iterating over "
+                    "the navigation dimensions, which is significantly "
+                    "slower.\n"
+                    "These components are:\n\t"
+                    + "\n\t".join(str(c) for c in missing_function_nd)
+                )
+            elif convolved:
+                warnings.warn(
+                    "Using convolution is not supported when fitting the "
+                    "dataset in batches. Fitting proceeds by iterating over "
+                    "the navigation dimensions, which is significantly "
+                    "slower."
+                )
+            else:
+                self._multifit_batched(
+                    batch_size=batch_size,
+                    mask=mask,
+                    fetch_only_fixed=fetch_only_fixed,
+                    show_progressbar=show_progressbar,
+                    checkpoint=checkpoint,
+                    **kwargs,
+                )
+                if autosave is True:
+                    _logger.info(f"Deleting temporary file: {autosave_fn}")
+                    os.remove(autosave_fn)
+                self._binned = None
+                return
+
         if linear_fitting:
             # Check that all non-free parameters don't change accross
             # the navigation dimension. If this is the case, we can fit the
@@ -2030,11 +2489,13 @@ def multifit(
             nonfree_parameters = [
                 p for c in self.active_components for p in c.parameters if not p._free
             ]
+            # The values of twinned parameters are not fetched
             navigation_variable_nonfree_parameters = [
                 p
                 for p in nonfree_parameters
                 if (
-                    np.any(p.map["is_set"])
+                    p.twin is None
+                    and np.any(p.map["is_set"])
                     and np.any(p.map["values"] != p.map["values"][0])
                 )
             ]
@@ -2046,31 +2507,7 @@ def multifit(
                 if c.active_is_multidimensional and np.any(~c._active_array)
             ]
 
-            if len(navigation_variable_nonfree_parameters) > 0:
-                warnings.warn(
-                    "The model contains non-free parameters that have set "
-                    "values that vary across the navigation indices, which "
-                    "is not supported when fitting the dataset in a vectorized "
-                    "fashion. Fitting proceeds by iterating over the "
-                    "navigation dimensions, which is significantly slower "
-                    "than if all parameters had constant values.\n"
-                    "These parameters are:\n\t"
-                    + "\n\t".join(
-                        str(x) for x in navigation_variable_nonfree_parameters
-                    )
-                )
-
-            elif len(active_is_multidimensional) > 0:
-                warnings.warn(
-                    "The model contains active components that are not active "
-                    "for all navigation indices, which is not supported "
-                    "when fitting the dataset in a vectorized "
-                    "fashion. Fitting proceeds by iterating over the "
-                    "navigation dimensions, which is significantly slower.\n"
-                    "These components are:\n\t"
-                    + "\n\t".join(str(c) for c in active_is_multidimensional)
-                )
-            elif convolved:
+            if convolved:
                 warnings.warn(
                     "Using convolution is not supported when fitting the "
                     "dataset in a vectorized fashion. Fitting proceeds by "
@@ -2085,6 +2522,22 @@ def multifit(
                     "fashion.  Fitting proceeds by iterating over the "
                     "navigation dimensions, which is significantly slower."
                 )
+            elif (
+                len(navigation_variable_nonfree_parameters) > 0
+                or len(active_is_multidimensional) > 0
+            ):
+                # The component data only depend on the non-free parameters
+                # and on the active state of the components: the navigation
+                # positions sharing the same values are fitted together
+                self._multifit_linear_grouped(
+                    parameters=navigation_variable_nonfree_parameters,
+                    components=active_is_multidimensional,
+                    mask=mask,
+                    show_progressbar=show_progressbar,
+                    **kwargs,
+                )
+                self._binned = None
+                return
             else:
                 # We can fit the whole dataset:
                 # 1. do the fit
@@ -2096,7 +2549,13 @@ def multifit(
                 # passing it down to 'ridge_regression'
                 if self.signal._lazy:
                     kwargs["show_progressbar"] = show_progressbar
+                start_time = time.perf_counter()
                 self.fit(**kwargs)
+                self.fit_diagnostics._store(
+                    ...,
+                    self.fit_output,
+                    time=(time.perf_counter() - start_time) / self.chisq.data.size,
+                )
 
                 # TODO: check what happen to linear twinned parameter
                 for i, para in enumerate(self._free_parameters):
@@ -2128,6 +2587,174 @@ def multifit(
                 return
         # Fitting in a vectorized fashion is not supported. We iterate over the
         # navigation indices and fit the dataset one by one.
+        if (
+            num_workers is not None or maps_dir is not None
+        ) and self.axes_manager.navigation_dimension:
+            if maps_dir is not None:
+                chunks = self._get_navigation_chunks()
+            else:
+                # Each chunk is a contiguous block of rows of the slowest
+                # navigation axis, so that the `iterpath` is followed inside
+                # each chunk
+                chunks = [
+                    (slice(c[0], c[-1] + 1),)
+                    for c in np.array_split(
+                        np.arange(self.axes_manager._navigation_shape_in_array[0]),
+                        int(num_workers),
+                    )
+                    if c.size
+                ]
+            self._multifit_chunks(
+                chunks,
+                num_workers=num_workers,
+                scheduler=scheduler,
+                mask=mask,
+                fetch_only_fixed=fetch_only_fixed,
+                iterpath=iterpath,
+                show_progressbar=show_progressbar,
+                checkpoint=checkpoint,
+                **kwargs,
+            )
+        else:
+            with progressbar(
+                total=maxval, disable=not show_progressbar, leave=True
+            ) as pbar:
+                self._multifit_iterate(
+                    mask=mask,
+                    fetch_only_fixed=fetch_only_fixed,
+                    iterpath=iterpath,
+                    interactive_plot=interactive_plot,
+                    pbar=pbar,
+                    checkpoint=checkpoint,
+                    autosave_every=autosave_every,
+                    **kwargs,
+                )
+
+        if autosave is True:
+            _logger.info(f"Deleting temporary file: {autosave_fn}")
+            os.remove(autosave_fn)
+
+        # _binned attribute is re-set to None so the behaviour of future fit() calls
+        # is not altered. In future implementation, a more elegant implementation
+        # could be found
+        self._binned = None
+
+    multifit.__doc__ %= SHOW_PROGRESSBAR_ARG
+
+    def _multifit_linear_grouped(
+        self, parameters, components, mask=None, show_progressbar=None, **kwargs
+    ):
+        """Fit the dataset with a linear optimizer when the values of some
+        non-free parameters or the active state of some components vary
+        across the navigation space.
+
+        The navigation positions are grouped by the values of the non-free
+        ``parameters`` and by the active state of the ``components``. As the
+        component data are the same for all the positions of a group, each
+        group is fitted at once with the component data computed only once.
+        Non-free parameters without a stored value at a given position use
+        their current value.
+
+        The ``_binned`` attribute must be set before calling this method.
+        See :meth:`multifit` for the description of the parameters.
+        """
+        nav_shape = self.axes_manager._navigation_shape_in_array
+        size = int(np.prod(nav_shape))
+        current_values = {p: p.value for p in parameters}
+        keys = [
+            np.where(
+                p.map["is_set"].reshape(size, 1),
+                p.map["values"].reshape(size, -1),
+                np.ravel(current_values[p]),
+            )
+            for p in parameters
+        ]
+        keys.extend(c._active_array.reshape(size, 1) for c in components)
+        keys = np.concatenate(keys, axis=1)
+
+        positions = np.arange(size)
+        if mask is not None:
+            positions = positions[~mask.ravel()]
+        _, inverse, counts = np.unique(
+            keys[positions], axis=0, return_inverse=True, return_counts=True
+        )
+        order = np.argsort(inverse.ravel(), kind="stable")
+        groups = np.split(positions[order], np.cumsum(counts)[:-1])
+        groups.sort(key=lambda group: group[0])
+        _logger.info(
+            f"Fitting {positions.size} navigation positions in {len(groups)} " "groups."
+        )
+
+        kwargs["only_current"] = False
+        calculate_errors = kwargs.get("calculate_errors", False)
+        with self.axes_manager.events.indices_changed.suppress_callback(
+            self.fetch_stored_values
+        ):
+            with self.suspend_update(update_on_resume=True), progressbar(
+                total=positions.size, disable=not show_progressbar, leave=True
+            ) as pbar:
+                for group in groups:
+                    # The first position of the group is used to set the
+                    # values of the non-free parameters and the active state
+                    # of the components
+                    indices = np.unravel_index(group, nav_shape)
+                    first = tuple(int(i[0]) for i in indices)
+                    self.axes_manager.indices = first[::-1]
+                    self.fetch_stored_values(only_fixed=True)
+                    for p in parameters:
+                        if not p.map["is_set"][first]:
+                            p.value = current_values[p]
+                    start_time = time.perf_counter()
+                    self.fit(navigation_indices=group, **kwargs)
+                    self.fit_diagnostics._store(
+                        indices,
+                        self.fit_output,
+                        time=(time.perf_counter() - start_time) / group.size,
+                    )
+
+                    for i, para in enumerate(self._free_parameters):
+                        para.map["values"][indices] = self.fit_output.x[:, i]
+                        if calculate_errors:
+                            para.map["std"][indices] = self.fit_output.perror[:, i]
+                        else:
+                            para.map["std"][indices] = np.nan
+                        para.map["is_set"][indices] = True
+
+                    # The non-free (including twinned) parameters have the same
+                    # value for all the positions of the group
+                    for para in (
+                        p
+                        for c in self.active_components
+                        for p in c.parameters
+                        if not p.free
+                    ):
+                        para.map["values"][indices] = para.value
+                        para.map["std"][indices] = para.std
+                        para.map["is_set"][indices] = True
+                    pbar.update(group.size)
+            # Trigger the indices_changed event to update to current indices,
+            # since the callback was suppressed
+            self.axes_manager.events.indices_changed.trigger(self.axes_manager)
+
+    def _multifit_iterate(
+        self,
+        mask=None,
+        fetch_only_fixed=False,
+        iterpath=None,
+        interactive_plot=False,
+        pbar=None,
+        checkpoint=None,
+        autosave_every=10,
+        **kwargs,
+    ):
+        """Fit the navigation positions one by one, following ``iterpath``.
+
+        The ``_binned`` attribute must be set before calling this method.
+        See :meth:`multifit` for the description of the parameters. If
+        ``checkpoint`` is not None, the fitted positions are appended to the
+        checkpoint every ``autosave_every`` positions.
+        """
+        nav_shape = self.axes_manager._navigation_shape_in_array
         i = 0
         with self.axes_manager.events.indices_changed.suppress_callback(
             self.fetch_stored_values
@@ -2141,38 +2768,410 @@ def multifit(
                     inner = dummy_context_manager
 
                 with outer(update_on_resume=True):
-                    with progressbar(
-                        total=maxval, disable=not show_progressbar, leave=True
-                    ) as pbar:
-                        for index in self.axes_manager:
-                            with inner(update_on_resume=True):
-                                if mask is None or not mask[index[::-1]]:
-                                    # first check if model has set initial values in
-                                    # parameters.map['values'][indices],
-                                    # otherwise use values from previous fit
-                                    self.fetch_stored_values(
-                                        only_fixed=fetch_only_fixed
-                                    )
-                                    self.fit(**kwargs)
-                                    i += 1
+                    for index in self.axes_manager:
+                        with inner(update_on_resume=True):
+                            if mask is None or not mask[index[::-1]]:
+                                # first check if model has set initial values in
+                                # parameters.map['values'][indices],
+                                # otherwise use values from previous fit
+                                self.fetch_stored_values(only_fixed=fetch_only_fixed)
+                                self.fit(**kwargs)
+                                i += 1
+                                if pbar is not None:
                                     pbar.update(1)
-
-                                if autosave and i % autosave_every == 0:
-                                    self.save_parameters2file(autosave_fn)
+                                if checkpoint is not None:
+                                    checkpoint.add(
+                                        np.ravel_multi_index(index[::-1], nav_shape)
+                                    )
+                                    if i % autosave_every == 0:
+                                        checkpoint.flush()
+                if checkpoint is not None:
+                    checkpoint.flush()
                 # Trigger the indices_changed event to update to current indices,
                 # since the callback was suppressed
                 self.axes_manager.events.indices_changed.trigger(self.axes_manager)
 
-        if autosave is True:
-            _logger.info(f"Deleting temporary file: {autosave_fn}.npz")
-            os.remove(autosave_fn + ".npz")
+    def _multifit_chunks(
+        self,
+        chunks,
+        num_workers=None,
+        scheduler="processes",
+        mask=None,
+        fetch_only_fixed=False,
+        iterpath=None,
+        show_progressbar=None,
+        checkpoint=None,
+        **kwargs,
+    ):
+        """Fit the navigation space chunk by chunk and merge the results back
+        in the model. See :meth:`multifit` for the description of the
+        parameters.
 
-        # _binned attribute is re-set to None so the behaviour of future fit() calls
-        # is not altered. In future implementation, a more elegant implementation
-        # could be found
-        self._binned = None
+        Parameters
+        ----------
+        chunks : iterable of tuple of slice
+            The navigation slices of each chunk, in array order.
+        num_workers : None or int
+            If None, the chunks are fitted one after the other in the current
+            process, otherwise they are fitted in parallel by ``num_workers``
+            workers.
+        checkpoint : None or :class:`~hyperspy.misc.model_tools._MultifitCheckpoint`
+            If not None, the fitted positions of each chunk are appended to
+            the checkpoint when the chunk is merged.
+        """
+        if num_workers is not None:
+            if scheduler not in ["processes", "threads"]:
+                raise ValueError(
+                    "`scheduler` must be one of 'processes' or 'threads', "
+                    f"not '{scheduler}'."
+                )
+            num_workers = int(num_workers)
+            if num_workers < 1:
+                raise ValueError("`num_workers` must be a positive integer.")
+
+        nav_dim = self.axes_manager.navigation_dimension
+        nav_shape = self.axes_manager._navigation_shape_in_array
+        nav_indices = np.arange(int(np.prod(nav_shape))).reshape(nav_shape)
+        send_dictionary = num_workers is not None and scheduler == "processes"
+        if send_dictionary:
+            from hyperspy.samfire_utils.samfire_pool import _walk_compute
+
+        def get_chunk_model(chunk):
+            chunk = chunk + (slice(None),) * (nav_dim - len(chunk))
+            sub_model = self.inav[chunk[::-1]]
+            if send_dictionary:
+                # Send the chunk to the worker as a dictionary, in the same
+                # way as the SAMFire workers
+                sub_model.store("chunk")
+                m_dict = sub_model.signal._to_dictionary(False)
+                m_dict["models"] = sub_model.signal.models._models.as_dictionary()
+                sub_model = _walk_compute(m_dict)
+            return sub_model
+
+        def merge(chunk, result):
+            maps, chisq, dof, diagnostics = result
+            for component, component_maps in zip(self, maps):
+                for parameter, map_ in zip(component.parameters, component_maps):
+                    parameter.map[chunk] = map_
+            self.chisq.data[chunk] = chisq
+            self.dof.data[chunk] = dof
+            # Keep the diagnostics of the masked positions
+            fitted = ... if mask is None else ~mask[chunk]
+            for signal, data in zip(self.fit_diagnostics._signals, diagnostics):
+                signal.data[chunk][fitted] = data[fitted]
+            if mask is None:
+                pbar.update(self.dof.data[chunk].size)
+            else:
+                pbar.update(int(np.sum(~mask[chunk])))
+            if checkpoint is not None:
+                fitted = nav_indices[chunk]
+                if mask is not None:
+                    fitted = fitted[~mask[chunk]]
+                checkpoint.add(fitted)
+                checkpoint.flush()
+
+        if num_workers is None:
+            executor = dummy_context_manager()
+        elif scheduler == "processes":
+            executor = ProcessPoolExecutor(max_workers=num_workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=num_workers)
+
+        masked = 0 if mask is None else mask.sum()
+        futures = {}
+        with executor as pool, progressbar(
+            total=self.axes_manager.navigation_size - masked,
+            disable=not show_progressbar,
+            leave=True,
+        ) as pbar:
+            for chunk in chunks:
+                chunk_kwargs = dict(
+                    mask=None if mask is None else mask[chunk],
+                    fetch_only_fixed=fetch_only_fixed,
+                    iterpath=iterpath,
+                    binned=self._binned,
+                    compile_backend=getattr(self, "_compile_backend", None),
+                    **kwargs,
+                )
+                if pool is None:
+                    merge(
+                        chunk, _multifit_chunk(get_chunk_model(chunk), **chunk_kwargs)
+                    )
+                    continue
+                # Limit the number of chunks waiting to be fitted to keep the
+                # memory usage bounded when the chunks are large
+                if len(futures) >= 2 * num_workers:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge(futures.pop(future), future.result())
+                future = pool.submit(
+                    _multifit_chunk, get_chunk_model(chunk), **chunk_kwargs
+                )
+                futures[future] = chunk
+            for future in as_completed(futures):
+                merge(futures[future], future.result())
 
-    multifit.__doc__ %= SHOW_PROGRESSBAR_ARG
+        for array in self._get_maps_arrays():
+            if isinstance(array, np.memmap):
+                array.flush()
+        self.fetch_stored_values()
+
+    def _get_maps_arrays(self):
+        """Return the parameter maps, chisq, dof and fit diagnostics arrays of
+        the model."""
+        arrays = [p.map for c in self for p in c.parameters]
+        arrays += [signal.data for signal in self.fit_diagnostics._signals]
+        return arrays + [self.chisq.data, self.dof.data]
+
+    @property
+    def _maps_on_disk(self):
+        return any(isinstance(p.map, np.memmap) for c in self for p in c.parameters)
+
+    def _store_maps_on_disk(self, maps_dir):
+        """Replace the parameter maps, chisq, dof and fit diagnostics arrays by
+        arrays memory-mapped to ``.npy`` files in the ``maps_dir`` directory.
+
+        Maps already memory-mapped to the corresponding file are kept as they
+        are.
+        """
+        os.makedirs(maps_dir, exist_ok=True)
+
+        def to_memmap(array, name):
+            filename = os.path.abspath(os.path.join(maps_dir, f"{name}.npy"))
+            if isinstance(array, np.memmap) and array.filename == filename:
+                return array
+            memmap = np.lib.format.open_memmap(
+                filename, mode="w+", dtype=array.dtype, shape=array.shape
+            )
+            memmap[...] = array
+            return memmap
+
+        for i, component in enumerate(self):
+            name = slugify(component.name, valid_variable_name=True)
+            for parameter in component.parameters:
+                parameter.map = to_memmap(parameter.map, f"{i}_{name}_{parameter.name}")
+        self.chisq.data = to_memmap(self.chisq.data, "chisq")
+        self.dof.data = to_memmap(self.dof.data, "dof")
+        for name in self.fit_diagnostics._fields:
+            signal = getattr(self.fit_diagnostics, name)
+            signal.data = to_memmap(signal.data, f"fit_diagnostics_{name}")
+
+    def _get_navigation_chunks(self):
+        """Return the navigation slices, in array order, of the chunks of the
+        data of the signal. For signals which are not lazy, the chunks are
+        those that dask would choose automatically."""
+        nav_dim = self.axes_manager.navigation_dimension
+        data = self.signal.data
+        if self.signal._lazy:
+            nav_chunks = self.signal.get_chunk_size()
+        else:
+            nav_chunks = da.core.normalize_chunks(
+                ("auto",) * nav_dim + (-1,) * (data.ndim - nav_dim),
+                shape=data.shape,
+                dtype=data.dtype,
+            )[:nav_dim]
+        return da.core.slices_from_chunks(nav_chunks)
+
+    def _multifit_batched(
+        self,
+        batch_size,
+        mask=None,
+        fetch_only_fixed=False,
+        show_progressbar=None,
+        checkpoint=None,
+        optimizer="lm",
+        loss_function="ls",
+        grad="fd",
+        bounded=False,
+        **kwargs,
+    ):
+        """Fit the navigation positions by batches of ``batch_size`` positions
+        with a vectorized Levenberg-Marquardt optimizer.
+
+        See :meth:`multifit` for the description of the parameters. If
+        ``checkpoint`` is not None, the fitted positions are appended to the
+        checkpoint after each batch.
+        """
+        if optimizer != "lm":
+            raise ValueError(
+                "Fitting in batches only supports `optimizer='lm'`, "
+                f"not '{optimizer}'."
+            )
+        if loss_function != "ls":
+            raise ValueError(
+                "Fitting in batches only supports least-squares fitting "
+                "(`loss_function='ls'`)."
+            )
+        if grad == "analytical":
+            _has_gradient, _jac_err_msg = self._check_analytical_jacobian()
+            if not _has_gradient:
+                raise ValueError(f"`grad='analytical' is not supported: {_jac_err_msg}")
+            missing_gradient_nd = [
+                c for c in self.active_components if not hasattr(c, "_gradient_nd")
+            ]
+            if missing_gradient_nd:
+                raise ValueError(
+                    "`grad='analytical'` is not supported when fitting in "
+                    "batches for the following components: "
+                    + ", ".join(str(c) for c in missing_gradient_nd)
+                )
+        elif grad != "fd":
+            raise ValueError(
+                "`grad` must be one of ['fd', 'analytical'] when fitting in "
+                f"batches, not '{grad}'."
+            )
+        unsupported_kwargs = set(kwargs) - {"ftol", "xtol", "maxfev"}
+        if unsupported_kwargs:
+            raise ValueError(
+                "The following keyword arguments are not supported when "
+                f"fitting in batches: {unsupported_kwargs}."
+            )
+        batch_size = int(batch_size)
+        if batch_size < 1:
+            raise ValueError("`batch_size` must be a positive integer.")
+
+        parameters = [p for c in self.active_components for p in c.free_parameters]
+        if not parameters:
+            raise RuntimeError("Model does not contain any free components!")
+        # Position of each free parameter in the vector of parameters
+        sizes = [p._number_of_elements for p in parameters]
+        columns = [slice(i - n, i) for i, n in zip(np.cumsum(sizes), sizes)]
+
+        if bounded:
+            self.ensure_parameters_in_bounds()
+            self._set_boundaries(bounded=True)
+            bounds = self._bounds_as_tuple(transpose=True)
+        else:
+            bounds = None
+
+        nav_shape = self.axes_manager._navigation_shape_in_array
+        nav_size = int(np.prod(nav_shape, dtype=int))
+        channels = np.where(self._channel_switches.ravel())[0]
+        data = self.signal.data.reshape((nav_size, -1))
+        variance = self.signal.get_noise_variance()
+        if isinstance(variance, BaseSignal):
+            variance = variance.data.reshape((nav_size, -1))
+
+        indices = np.arange(nav_size)
+        if mask is not None:
+            indices = indices[~mask.ravel()]
+
+        def _get_batch(array, batch):
+            array = array[batch][:, channels]
+            if isinstance(array, da.Array):
+                array = array.compute()
+            return np.asarray(array, dtype=float)
+
+        show_progressbar = show_progressbar and (indices.size != 0)
+        with progressbar(
+            total=indices.size, disable=not show_progressbar, leave=True
+        ) as pbar:
+            for start in range(0, indices.size, batch_size):
+                start_time = time.perf_counter()
+                batch = indices[start : start + batch_size]
+                y = _get_batch(data, batch)
+                if variance is None:
+                    weights = np.ones_like(y)
+                elif np.ndim(variance) == 0:
+                    weights = np.full_like(y, 1.0 / np.sqrt(variance))
+                else:
+                    weights = 1.0 / np.sqrt(_get_batch(variance, batch))
+
+                maps = self._get_parameter_maps(batch, only_fixed=fetch_only_fixed)
+                p0 = np.concatenate(
+                    [maps[p]["values"].reshape((batch.size, -1)) for p in parameters],
+                    axis=1,
+                )
+
+                def _maps_from_p(p, rows):
+                    maps_ = {par: map_[rows] for par, map_ in maps.items()}
+                    for par, column in zip(parameters, columns):
+                        maps_[par]["values"] = p[:, column].reshape(
+                            maps_[par]["values"].shape
+                        )
+                    self._set_twinned_values_in_maps(maps_)
+                    return maps_
+
+                def _residuals(p, rows):
+                    with self._swap_parameter_maps(_maps_from_p(p, rows)):
+                        model = self._get_model_data_nd()
+                    return (model - y[rows]) * weights[rows]
+
+                if grad == "analytical":
+
+                    def _jacobian(p, rows, residuals):
+                        with self._swap_parameter_maps(_maps_from_p(p, rows)):
+                            jac = self._get_jacobian_nd(parameters)
+                        return jac * weights[rows][..., np.newaxis]
+
+                else:
+
+                    def _jacobian(p, rows, residuals):
+                        # Forward finite differences
+                        jac = np.empty(residuals.shape + (p.shape[1],))
+                        eps = np.sqrt(np.finfo(float).eps)
+                        for i in range(p.shape[1]):
+                            h = eps * np.maximum(np.abs(p[:, i]), 1.0)
+                            p_h = p.copy()
+                            p_h[:, i] += h
+                            jac[..., i] = (_residuals(p_h, rows) - residuals) / h[
+                                :, np.newaxis
+                            ]
+                        return jac
+
+                res = _batched_levenberg_marquardt(
+                    _residuals, _jacobian, p0, bounds=bounds, **kwargs
+                )
+
+                # Estimated standard deviation of the parameters
+                n_channels, n_parameters = res["jac"].shape[-2:]
+                if n_channels > n_parameters:
+                    JTJ = np.matmul(res["jac"].swapaxes(-2, -1), res["jac"])
+                    pcov = np.linalg.pinv(JTJ)
+                    p_var = np.diagonal(pcov, axis1=-2, axis2=-1) * (
+                        res["cost"][:, np.newaxis] / (n_channels - n_parameters)
+                    )
+                    with np.errstate(invalid="ignore"):
+                        p_std = np.sqrt(p_var)
+                else:
+                    p_std = np.full_like(res["x"], np.nan)
+
+                # Store the results in the maps
+                maps = _maps_from_p(res["x"], slice(None))
+                for component in self.active_components:
+                    for parameter in component.parameters:
+                        map_ = maps[parameter]
+                        map_["is_set"] = True
+                        if parameter in parameters:
+                            column = columns[parameters.index(parameter)]
+                            map_["std"] = p_std[:, column].reshape(map_["std"].shape)
+                        parameter.map[np.unravel_index(batch, parameter.map.shape)] = (
+                            map_
+                        )
+                nav_indices = np.unravel_index(batch, self.chisq.data.shape)
+                self.chisq.data[nav_indices] = res["cost"]
+                self.dof.data[nav_indices] = n_parameters
+                if bounds is None:
+                    at_bounds = False
+                else:
+                    at_bounds = np.zeros(batch.size, dtype=bool)
+                    for bound in bounds:
+                        at_bounds |= np.isclose(
+                            res["x"], np.asarray(bound, dtype=float)
+                        ).any(axis=1)
+                self.fit_diagnostics._store(
+                    nav_indices,
+                    res,
+                    time=(time.perf_counter() - start_time) / batch.size,
+                    at_bounds=at_bounds,
+                )
+
+                pbar.update(batch.size)
+                if checkpoint is not None:
+                    checkpoint.add(batch)
+                    checkpoint.flush()
+
+        self.fetch_stored_values()
 
     def save_parameters2file(self, filename):
         """Save the parameters array in binary format.
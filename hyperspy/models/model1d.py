@@ -17,21 +17,29 @@
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
 import copy
+import importlib
+import logging
 
 import numpy as np
+import sympy
 import traits.api as t
 from scipy.special import huber
+from sympy.utilities.lambdify import lambdify
 
 import hyperspy.drawing.signal1d
+from hyperspy.components1d import Expression
 from hyperspy.decorators import interactive_range_selector
 from hyperspy.drawing.widgets import LabelWidget, VerticalLineWidget
 from hyperspy.events import EventSuppressor
 from hyperspy.exceptions import SignalDimensionError
+from hyperspy.misc.model_tools import FitDiagnostics
 from hyperspy.misc.utils import dummy_context_manager
 from hyperspy.model import BaseModel, ModelComponents
 from hyperspy.signal_tools import SpanSelectorInSignal1D
 from hyperspy.ui_registry import DISPLAY_DT, TOOLKIT_DT, add_gui_method
 
+_logger = logging.getLogger(__name__)
+
 
 @add_gui_method(toolkey="hyperspy.Model1D.fit_component")
 class ComponentFit(SpanSelectorInSignal1D):
@@ -253,7 +261,11 @@ def __init__(self, signal1D, dictionary=None):
         self.dof.metadata.General.title = (
             self.signal.metadata.General.title + " degrees of freedom"
         )
+        self._fit_diagnostics = FitDiagnostics(self)
         self.free_parameters_boundaries = None
+        self._compile_backend = None
+        self._compiled_functions = {}
+        self._compiled_model = None
         self._components = ModelComponents(self)
         if dictionary is not None:
             self._load_dictionary(dictionary)
@@ -328,10 +340,36 @@ def _get_model_data(self, component_list=None, ignore_channel_switches=False):
         slice_ = slice(None) if ignore_channel_switches else self._channel_switches
         axis = self.axis.axis[slice_]
         model_data = np.zeros(len(axis))
+        # The values of the components which support it are cached, keyed on
+        # the axis, the channel switches and the values of the parameters,
+        # so that only the components whose parameters have changed are
+        # evaluated again, e.g. when calculating finite-difference jacobians.
+        channels = None if ignore_channel_switches else slice_.tobytes()
         for component in component_list:
-            model_data += component.function(axis)
+            if component._model_data_cacheable:
+                model_data += self._get_component_data_cached(component, axis, channels)
+            else:
+                model_data += component.function(axis)
         return model_data
 
+    def _get_component_data_cached(self, component, axis, channels):
+        """Return the value of the component function on ``axis`` using the
+        cached value when the axis, the channel switches and the values of the
+        parameters haven't changed since the last evaluation.
+        """
+        values = tuple(parameter.value for parameter in component.parameters)
+        cache = component._model_data_cache
+        if (
+            cache is not None
+            and cache[0] is self.axis.axis
+            and cache[1] == channels
+            and cache[2] == values
+        ):
+            return cache[3]
+        data = component.function(axis)
+        component._model_data_cache = (self.axis.axis, channels, values, data)
+        return data
+
     def _get_current_data(
         self,
         onlyactive=False,
@@ -390,6 +428,215 @@ def _get_current_data(
                 model_data *= np.gradient(self.axis.axis)
         return model_data
 
+    def _model_function(self, param):
+        if self._compiled_model is None:
+            return super()._model_function(param)
+        self.p0 = param
+        function, _, x, fixed, scale = self._compiled_model
+        return np.broadcast_to(function(x, *param, *fixed), x.shape) * scale
+
+    def compile(self, backend="numpy"):
+        """Combine the active components of the model in a single function
+        and calculate its jacobian with respect to the free parameters, to
+        speed up fitting.
+
+        The expressions of the components are combined symbolically using
+        sympy, taking into account the twinned parameters. The values of the
+        fixed parameters are arguments of the compiled function, therefore
+        changing them doesn't require to compile the model again. The model is
+        compiled again automatically when fitting if the active components,
+        the free parameters or the twins have changed. Only the components
+        based on :class:`~.api.model.components1D.Expression` are supported.
+
+        Since all the components are evaluated together, compiling the model
+        is most beneficial when fitting with ``grad="analytical"``, where the
+        jacobian of the whole model is calculated in a single call.
+
+        Parameters
+        ----------
+        backend : {"numpy", "numexpr", "numba", None}, default "numpy"
+            The library used to evaluate the compiled functions. If
+            ``"numexpr"`` or ``"numba"`` are not installed, ``"numpy"`` is
+            used instead. If None, the compiled functions are discarded and
+            the components are evaluated one by one when fitting.
+
+        Raises
+        ------
+        ValueError
+            If the model contains active components which are not based on
+            :class:`~.api.model.components1D.Expression` or if the model is
+            convolved.
+
+        Examples
+        --------
+        >>> s = hs.signals.Signal1D(np.random.random((10, 100)))
+        >>> m = s.create_model()
+        >>> m.extend([hs.model.components1D.Gaussian() for i in range(5)])
+        >>> m.compile()
+        >>> m.multifit() # doctest: +SKIP
+
+        """
+        if backend not in ["numpy", "numexpr", "numba", None]:
+            raise ValueError(
+                "`backend` must be one of 'numpy', 'numexpr', 'numba' or None, "
+                f"not '{backend}'."
+            )
+        if backend == "numexpr" and importlib.util.find_spec("numexpr") is None:
+            backend = "numpy"
+            _logger.warning(
+                "Numexpr is not installed, falling back to numpy, "
+                "which is slower to calculate model."
+            )
+        elif backend == "numba" and importlib.util.find_spec("numba") is None:
+            backend = "numpy"
+            _logger.warning(
+                "Numba is not installed, falling back to numpy, "
+                "which is slower to calculate model."
+            )
+        self._compile_backend = backend
+        self._compiled_functions = {}
+        self._compiled_model = None
+        if backend is not None:
+            # Compile now to raise errors early
+            self._check_compiled_model()
+            self._compiled_model = None
+
+    def _check_compiled_model(self):
+        """Compile the model again if its components, free parameters or
+        twins have changed and update the arguments of the compiled functions:
+        axis, values of the fixed parameters and binning.
+        """
+        self._compiled_model = None
+        if self._compile_backend is None:
+            return
+        key = tuple(
+            (
+                id(component),
+                component.active,
+                tuple(
+                    (p.free, id(p.twin), p.twin_function_expr)
+                    for p in component.parameters
+                ),
+            )
+            for component in self
+        )
+        if key not in self._compiled_functions:
+            self._compiled_functions[key] = self._compile_functions(
+                self._compile_backend
+            )
+        function, jacobian, fixed_parameters = self._compiled_functions[key]
+
+        x = self.axis.axis[self._channel_switches]
+        binned = self._binned if self._binned is not None else self.axis.is_binned
+        if binned:
+            if self.axis.is_uniform:
+                scale = self.axis.scale
+            else:
+                scale = np.gradient(self.axis.axis)[self._channel_switches]
+        else:
+            scale = 1.0
+        fixed = [p.value for p in fixed_parameters]
+        self._compiled_model = (function, jacobian, x, fixed, scale)
+
+    def _compile_functions(self, backend):
+        """Combine the expressions of the active components and return the
+        compiled model function, its jacobian (None if it can't be calculated)
+        and the list of fixed parameters, whose values are the last arguments
+        of these functions.
+        """
+        try:
+            convolved = self.convolved
+        except NotImplementedError:
+            convolved = False
+        if convolved:
+            raise ValueError("Convolved models can't be compiled.")
+        not_supported = [
+            c
+            for c in self.active_components
+            if not isinstance(c, Expression) or c._is2D
+        ]
+        if not_supported:
+            raise ValueError(
+                "Only models containing `Expression` components can be "
+                "compiled. These components are not supported:\n\t"
+                + "\n\t".join(str(c) for c in not_supported)
+            )
+
+        x = sympy.Symbol("x", real=True)
+        free_parameters = [p for c in self.active_components for p in c.free_parameters]
+        symbols = {
+            p: sympy.Symbol(f"p{i}", real=True) for i, p in enumerate(free_parameters)
+        }
+        fixed_parameters = []
+
+        def parameter_expression(parameter):
+            if parameter in symbols:
+                return symbols[parameter]
+            if parameter.twin is not None:
+                twin_expression = parameter_expression(parameter.twin)
+                if not parameter.twin_function_expr:
+                    return twin_expression
+                return sympy.sympify(parameter.twin_function_expr).subs(
+                    "x", twin_expression
+                )
+            # Fixed parameter, or free parameter of an inactive component
+            symbols[parameter] = sympy.Symbol(f"c{len(fixed_parameters)}", real=True)
+            fixed_parameters.append(parameter)
+            return symbols[parameter]
+
+        expression = sympy.Integer(0)
+        for component in self.active_components:
+            parameters = {p.name: p for p in component.parameters}
+            substitutions = {}
+            for symbol in component._parsed_expr.free_symbols:
+                if symbol.name == "x":
+                    substitutions[symbol] = x
+                else:
+                    name = component._rename_pars.get(symbol.name, symbol.name)
+                    substitutions[symbol] = parameter_expression(parameters[name])
+            expression += component._parsed_expr.subs(substitutions, simultaneous=True)
+        expression = expression.evalf()
+        variables = [x] + [symbols[p] for p in free_parameters + fixed_parameters]
+        derivatives = [sympy.diff(expression, symbols[p]) for p in free_parameters]
+        if any(d.has(sympy.Derivative, sympy.Subs) for d in derivatives):
+            # Derivatives of functions unknown to sympy can't be evaluated
+            derivatives = None
+
+        if backend == "numpy":
+            function = lambdify(variables, expression, modules=backend, dummify=False)
+            jacobian = (
+                None
+                if derivatives is None
+                else lambdify(
+                    variables, derivatives, modules=backend, dummify=False, cse=True
+                )
+            )
+        else:
+            # numexpr and numba can't evaluate several expressions at once, so
+            # the derivatives are evaluated one by one
+            if backend == "numba":
+                import numba
+
+                def _lambdify(expr):
+                    return numba.njit(
+                        lambdify(variables, expr, modules="numpy", dummify=False)
+                    )
+            else:
+
+                def _lambdify(expr):
+                    return lambdify(variables, expr, modules=backend, dummify=False)
+
+            function = _lambdify(expression)
+            if derivatives is None:
+                jacobian = None
+            else:
+                derivative_functions = [_lambdify(d) for d in derivatives]
+
+                def jacobian(*args):
+                    return [f(*args) for f in derivative_functions]
+
+        return function, jacobian, fixed_parameters
+
     def _errfunc(self, param, y, weights=None):
         if weights is None:
             weights = 1.0
@@ -526,6 +773,8 @@ def _check_analytical_jacobian(self):
         If they do, return True and an empty string.
         If they do not, return False and an error message.
         """
+        if self._compiled_model is not None and self._compiled_model[1] is not None:
+            return True, ""
         missing_gradients = []
         for component in self:
             if component.active:
@@ -548,6 +797,13 @@ def _jacobian(self, param, y, weights=None):
         if weights is None:
             weights = 1.0
 
+        if self._compiled_model is not None and self._compiled_model[1] is not None:
+            _, jacobian, x, fixed, scale = self._compiled_model
+            grad = np.empty((len(param), len(x)))
+            for i, par_grad in enumerate(jacobian(x, *param, *fixed)):
+                grad[i] = par_grad
+            return grad * weights * scale
+
         axis = self.axis.axis[self._channel_switches]
         counter = 0
         grad = axis
@@ -577,6 +833,81 @@ def _jacobian(self, param, y, weights=None):
 
         return to_return
 
+    def _get_model_data_nd(self, component_list=None):
+        """
+        Return the model data for all the navigation indices of the parameter
+        maps, using the ``function_nd`` method of the components.
+
+        Parameters
+        ----------
+        component_list : list or None
+            If None, the model is constructed with all active components.
+            Otherwise, the model is constructed with the active components
+            in component_list.
+
+        Returns
+        -------
+        model_data: `ndarray`
+            The model data, of shape ``navigation_shape + (channels,)``,
+            where ``channels`` is the number of channels in the signal range.
+        """
+        if component_list is None:
+            component_list = self
+        axis = self.axis.axis[self._channel_switches]
+        model_data = 0
+        for component in component_list:
+            if component.active_is_multidimensional:
+                active = component._active_array[..., np.newaxis]
+                model_data = model_data + np.where(
+                    active, component.function_nd(axis), 0
+                )
+            elif component.active:
+                model_data = model_data + component.function_nd(axis)
+        model_data = model_data * np.ones(axis.shape)
+
+        binned = self.axis.is_binned if self._binned is None else self._binned
+        if binned:
+            if self.axis.is_uniform:
+                model_data *= self.axis.scale
+            else:
+                model_data *= np.gradient(self.axis.axis)[self._channel_switches]
+        return model_data
+
+    def _get_jacobian_nd(self, parameters):
+        """
+        Return the jacobian of the model with respect to the given parameters
+        for all the navigation indices of the parameter maps. Only supported
+        by :class:`~.api.model.components1D.Expression` components.
+
+        Parameters
+        ----------
+        parameters : list of :class:`~hyperspy.component.Parameter`
+            The free parameters.
+
+        Returns
+        -------
+        jacobian: `ndarray`
+            The jacobian, of shape
+            ``navigation_shape + (channels, len(parameters))``.
+        """
+        axis = self.axis.axis[self._channel_switches]
+        grad = []
+        for parameter in parameters:
+            par_grad = parameter.component._gradient_nd(parameter, axis)
+            for par in parameter._twins:
+                par_grad += par.component._gradient_nd(par, axis)
+            grad.append(par_grad)
+        jacobian = np.stack(grad, axis=-1)
+
+        if self.axis.is_binned:
+            if self.axis.is_uniform:
+                jacobian *= self.axis.scale
+            else:
+                jacobian *= np.gradient(self.axis.axis)[self._channel_switches][
+                    :, np.newaxis
+                ]
+        return jacobian
+
     def _function4odr(self, param, x):
         return self._model_function(param)
 
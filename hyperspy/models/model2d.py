@@ -20,6 +20,7 @@
 
 import numpy as np
 
+from hyperspy.misc.model_tools import FitDiagnostics
 from hyperspy.model import BaseModel, ModelComponents
 
 _SIGNAL_RANGE_VALUES = """x1, x2 : None or float
@@ -110,6 +111,7 @@ def __init__(self, signal2D, dictionary=None):
         self.dof.metadata.General.title = (
             self.signal.metadata.General.title + " degrees of freedom"
         )
+        self._fit_diagnostics = FitDiagnostics(self)
         self.free_parameters_boundaries = None
         self._components = ModelComponents(self)
         if dictionary is not None:
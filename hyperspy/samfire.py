@@ -361,6 +361,36 @@ def update(self, ind, results=None, isgood=None):
         if not isgood and results is not None:
             self._swap_dict_and_model(ind, results)
 
+    def update_batch(self, inds, results, isgood):
+        """Updates the current model with the results of several pixels,
+        received together from the workers, and then updates the active
+        strategy once for all of them.
+
+        Parameters
+        ----------
+        inds : list of tuple
+            the indices of the pixels of the results
+        results : list of {dict, None}
+            the dictionaries of the results, see :meth:`update`.
+        isgood : list of {bool, None}
+            if it is known if the results are good according to the
+            goodness-of-fit test. If None, the pixel is tested.
+        """
+        isgood = list(isgood)
+        for i, (ind, result) in enumerate(zip(inds, results)):
+            if result is not None and (isgood[i] is None or isgood[i]):
+                self._swap_dict_and_model(ind, result)
+            if isgood[i] is None:
+                isgood[i] = self.metadata.goodness_test.test(self.model, ind)
+        self.count += len(inds)
+        if self._progressbar is not None:
+            self._progressbar.update(sum(bool(good) for good in isgood))
+
+        self.active_strategy.update_batch(inds, isgood)
+        for ind, result, good in zip(inds, results, isgood):
+            if not good and result is not None:
+                self._swap_dict_and_model(ind, result)
+
     def refresh_database(self):
         """Refresh currently selected strategy without preserving any
         "ignored" pixels; no previous structure is preserved.
@@ -428,7 +458,7 @@ def change_strategy(self, new_strat):
             current.close_plot()
         self._active_strategy_ind = new_strat
 
-    def generate_values(self, need_inds):
+    def generate_values(self, need_inds, include_data=True):
         """Returns an iterator that yields the index of the pixel and the
         value dictionary to be sent to the workers.
 
@@ -436,6 +466,9 @@ def generate_values(self, need_inds):
         ----------
         need_inds : int
             the number of pixels to be returned in the generator
+        include_data : bool, default True
+            if False, the data of the pixel is not included in the value
+            dictionary, for workers which access it through shared memory.
         """
         if need_inds:
             # get pixel index
@@ -443,28 +476,32 @@ def generate_values(self, need_inds):
                 # get starting parameters / array of possible values
                 value_dict = self.active_strategy.values(ind)
                 value_dict["fitting_kwargs"] = self._args
-                value_dict["signal.data"] = self.model.signal.data[ind + (...,)]
-                if self.model.signal._lazy:
-                    value_dict["signal.data"] = value_dict["signal.data"].compute()
-                if self.model.signal.metadata.has_item(
-                    "Signal.Noise_properties.variance"
-                ):
-                    var = self.model.signal.metadata.Signal.Noise_properties.variance
-                    if isinstance(var, BaseSignal):
-                        dat = var.data[ind + (...,)]
-                        value_dict["variance.data"] = (
-                            dat.compute() if var._lazy else dat
-                        )
-                if hasattr(self.model, "low_loss") and self.model.low_loss is not None:
-                    dat = self.model.low_loss.data[ind + (...,)]
-                    value_dict["low_loss.data"] = (
-                        dat.compute() if self.model.low_loss._lazy else dat
-                    )
+                if include_data:
+                    value_dict.update(self._get_pixel_data(ind))
 
                 self.running_pixels.append(ind)
                 self.metadata.marker[ind] = 0.0
                 yield ind, value_dict
 
+    def _get_pixel_data(self, ind):
+        """Returns the data of the pixel required by the workers: the signal,
+        the noise variance and the low-loss, if any."""
+        pixel_data = {}
+        pixel_data["signal.data"] = self.model.signal.data[ind + (...,)]
+        if self.model.signal._lazy:
+            pixel_data["signal.data"] = pixel_data["signal.data"].compute()
+        if self.model.signal.metadata.has_item("Signal.Noise_properties.variance"):
+            var = self.model.signal.metadata.Signal.Noise_properties.variance
+            if isinstance(var, BaseSignal):
+                dat = var.data[ind + (...,)]
+                pixel_data["variance.data"] = dat.compute() if var._lazy else dat
+        if hasattr(self.model, "low_loss") and self.model.low_loss is not None:
+            dat = self.model.low_loss.data[ind + (...,)]
+            pixel_data["low_loss.data"] = (
+                dat.compute() if self.model.low_loss._lazy else dat
+            )
+        return pixel_data
+
     def _next_pixels(self, number):
         best = self.metadata.marker.max()
         inds = []
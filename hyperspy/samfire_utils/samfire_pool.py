@@ -19,12 +19,16 @@
 
 import logging
 import time
-from multiprocessing import Manager
+from multiprocessing import Manager, resource_tracker
 
 import numpy as np
 from dask.array import Array as dar
 
 from hyperspy.samfire_utils.samfire_worker import create_worker
+from hyperspy.samfire_utils.shared_memory import (
+    restore_model_arrays,
+    share_model_arrays,
+)
 from hyperspy.utils.parallel_pool import ParallelPool
 
 _logger = logging.getLogger(__name__)
@@ -66,6 +70,17 @@ class SamfirePool(ParallelPool):
       addressing individual workers in general. This one is checked with
       higher priority in workers.
 
+    With ``shared_memory=True``, the data of the signal and the parameter maps
+    are copied once to shared memory blocks that the multiprocessing workers
+    access directly: the jobs only carry the pixel index and the starting
+    values, and the workers write their results to the parameter maps of the
+    model instead of sending them through the result queue.
+
+    For fast models, the cost of sending one message per pixel can exceed the
+    fitting time. With ``batch_size`` larger than 1, each job contains several
+    pixels, whose results are returned in a single message and applied to the
+    SAMFire strategy together.
+
     Attributes
     ----------
     has_pool : bool
@@ -87,11 +102,44 @@ class SamfirePool(ParallelPool):
         If recorded, stores one-way trip time of each worker
     pid : dict
         If available, stores the process-id of each worker
+    shared_memory : bool
+        Whether the multiprocessing workers access the data and the parameter
+        maps through shared memory.
+    batch_size : int
+        The number of pixels sent to a worker in each job.
+    jobs_per_worker : int
+        The number of jobs waiting in the queue for each worker, i.e. the
+        in-flight depth of the queue.
     """
 
-    def __init__(self, **kwargs):
-        """Creates a ParallelPool with additional methods for SAMFire. All
-        arguments are passed to ParallelPool"""
+    def __init__(self, shared_memory=False, batch_size=1, jobs_per_worker=1, **kwargs):
+        """Creates a ParallelPool with additional methods for SAMFire.
+
+        Parameters
+        ----------
+        shared_memory : bool, default False
+            If True and the pool uses multiprocessing, the data and the
+            parameter maps are shared with the workers using
+            :mod:`python:multiprocessing.shared_memory` instead of being sent
+            with every job and result.
+        batch_size : int, default 1
+            The number of pixels sent to a worker in each job. Larger batches
+            reduce the communication overhead for fast models, at the cost of
+            the strategy being updated less often.
+        jobs_per_worker : int, default 1
+            The number of jobs waiting in the queue for each worker. Larger
+            values keep the workers busy when the results take time to be
+            processed.
+        **kwargs : dict
+            All other arguments are passed to
+            :class:`~.utils.parallel_pool.ParallelPool`.
+        """
+        self.shared_memory = shared_memory
+        self.shared = None
+        if batch_size < 1 or jobs_per_worker < 1:
+            raise ValueError("`batch_size` and `jobs_per_worker` must be positive.")
+        self.batch_size = int(batch_size)
+        self.jobs_per_worker = int(jobs_per_worker)
         super().__init__(**kwargs)
         self.samf = None
         self.ping = {}
@@ -103,6 +151,13 @@ def __init__(self, **kwargs):
         self._last_time = 0
         self.results = []
 
+    def _setup_multiprocessing(self):
+        if self.shared_memory:
+            # The workers must share the resource tracker of the main process,
+            # otherwise they would destroy the shared memory when exiting
+            resource_tracker.ensure_running()
+        return super()._setup_multiprocessing()
+
     def _timestep_set(self, value):
         value = np.abs(value)
         self._timestep = value
@@ -164,8 +219,16 @@ def prepare_workers(self, samfire):
                 optional_names,
             )
 
+        if self.is_ipyparallel and self.shared_memory:
+            _logger.warning(
+                "Shared memory is only supported by multiprocessing pools, "
+                "the data is sent with every job."
+            )
+
         if self.is_multiprocessing:
             _logger.debug("preparing multiprocessing workers")
+            if self.shared_memory and self.shared is None:
+                self.shared = share_model_arrays(mall)
             manager = Manager()
             self.shared_queue = manager.Queue()
             self.result_queue = manager.Queue()
@@ -175,6 +238,8 @@ def prepare_workers(self, samfire):
                 this_queue.put(("setup_test", (samfire.metadata._gt_dump,)))
                 this_queue.put(("create_model", (m_dict, "z")))
                 this_queue.put(("set_optional_names", (optional_names,)))
+                if self.shared is not None:
+                    this_queue.put(("attach_shared_memory", (self.shared.spec,)))
                 self.pool.apply_async(
                     create_worker,
                     args=(i, this_queue, self.shared_queue, self.result_queue),
@@ -267,16 +332,36 @@ def add_jobs(self, needed_number=None):
         def test_func(worker, ind, value_dict):
             return worker.run_pixel(ind, value_dict)
 
+        def test_func_batch(worker, jobs):
+            return worker.run_pixels(jobs)
+
         if needed_number is None:
             needed_number = self.need_pixels
-        for ind, value_dict in self.samf.generate_values(needed_number):
+        include_data = self.shared is None
+        jobs = list(self.samf.generate_values(needed_number, include_data))
+        if self.batch_size == 1:
+            for ind, value_dict in jobs:
+                if self.is_multiprocessing:
+                    self.shared_queue.put(("run_pixel", (ind, value_dict)))
+                elif self.is_ipyparallel:
+                    self.results.append(
+                        (
+                            self.pool.apply_async(
+                                test_func, self.rworker, ind, value_dict
+                            ),
+                            ind,
+                        )
+                    )
+            return
+        for i in range(0, len(jobs), self.batch_size):
+            batch = jobs[i : i + self.batch_size]
             if self.is_multiprocessing:
-                self.shared_queue.put(("run_pixel", (ind, value_dict)))
+                self.shared_queue.put(("run_pixels", (batch,)))
             elif self.is_ipyparallel:
                 self.results.append(
                     (
-                        self.pool.apply_async(test_func, self.rworker, ind, value_dict),
-                        ind,
+                        self.pool.apply_async(test_func_batch, self.rworker, batch),
+                        [ind for ind, _ in batch],
                     )
                 )
 
@@ -295,6 +380,11 @@ def parse(self, value):
             * ('Error', (worker_id, error_message_string))
             * ('result', (worker_id, pixel_index, result_dict,
               bool_if_result_converged))
+            * ('results', (worker_id, list_of_(pixel_index, result_dict,
+              bool_if_result_converged)))
+
+            When the workers use shared memory, ``result_dict`` is None since
+            the results are already written to the model.
         """
         if value is None:
             keyword = "Failed"
@@ -324,6 +414,23 @@ def parse(self, value):
                 samf.plot(on_count=True)
                 samf.backup()
                 samf.log(ind, isgood, samf.count, _id)
+        elif keyword == "results":
+            _id, results = the_rest
+            _logger.debug("Got results from {} pixels".format(len(results)))
+            results = [res for res in results if res[0] in samf.running_pixels]
+            if not results:
+                return
+            for ind, _, _ in results:
+                samf.running_pixels.remove(ind)
+            inds, dicts, isgood = zip(*results)
+            samf.update_batch(inds, dicts, isgood)
+            counts = range(samf.count - len(inds) + 1, samf.count + 1)
+            if samf.plot_every and any(not c % samf.plot_every for c in counts):
+                samf.plot()
+            if any(c % samf.save_every == 0 for c in counts):
+                samf.backup(on_count=False)
+            for count, ind, good in zip(counts, inds, isgood):
+                samf.log(ind, good, count, _id)
         else:
             _logger.error(
                 "Unusual return from some worker. The value " "is:\n%s" % str(value)
@@ -354,7 +461,10 @@ def collect_results(self, timeout=None):
                             "Ind {} failed to come back in {} "
                             "seconds. Assuming failed".format(ind, timeout)
                         )
-                        result = ("result", (-1, ind, None, False))
+                        if isinstance(ind, list):
+                            result = ("results", (-1, [(i, None, False) for i in ind]))
+                        else:
+                            result = ("result", (-1, ind, None, False))
                     self.parse(result)
                     self.results.remove((res, ind))
                     found_something = True
@@ -377,11 +487,13 @@ def collect_results(self, timeout=None):
     @property
     def need_pixels(self):
         """Returns the number of pixels that should be added to the processing
-        queue. At most is equal to the number of workers.
+        queue. At most is equal to the number of workers times
+        ``jobs_per_worker`` times ``batch_size``.
         """
+        needed_jobs = self.num_workers * self.jobs_per_worker - len(self)
         return min(
             self.samf.pixels_done * self.samf.metadata.marker.ndim,
-            self.num_workers - len(self),
+            needed_jobs * self.batch_size,
         )
 
     @property
@@ -426,5 +538,8 @@ def stop(self):
             self.pool.close()
             self.pool.terminate()
             self.pool.join()
+            if self.shared is not None:
+                restore_model_arrays(self.samf.model, self.shared)
+                self.shared = None
         elif self.is_ipyparallel:
             self.pool.client.clear()
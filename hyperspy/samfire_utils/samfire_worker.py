@@ -26,6 +26,10 @@
 import cloudpickle
 import numpy as np
 
+from hyperspy.samfire_utils.shared_memory import (
+    SharedArrays,
+    _get_result_signal_names,
+)
 from hyperspy.signal import BaseSignal
 from hyperspy.utils.model_selection import AICc
 
@@ -48,6 +52,7 @@ def __init__(
         self.optional_names = set()
         self.model = None
         self.parameters = {}
+        self.shared = None
 
     def create_model(self, signal_dict, model_letter):
         _logger.debug("Creating model in worker {}".format(self.identity))
@@ -68,14 +73,58 @@ def create_model(self, signal_dict, model_letter):
 
     def _array_views_to_copies(self):
         dct = self.model.__dict__
-        self.parameters = {}
         for k, v in dct.items():
             if isinstance(v, BaseSignal):
                 v.data = v.data.copy()
-                if k not in ["signal", "image", "spectrum"] and not k.startswith("_"):
-                    self.parameters[k] = None
             if isinstance(v, np.ndarray):
                 dct[k] = v.copy()
+        self.parameters = {k: None for k in _get_result_signal_names(self.model)}
+
+    def attach_shared_memory(self, spec):
+        """Access the data and the maps of the full model, stored in shared
+        memory by the main process. The jobs then do not need to carry the
+        data of the pixel, and the results are written to the shared maps.
+
+        Parameters
+        ----------
+        spec : dict
+            The ``spec`` of the :class:`~.samfire_utils.shared_memory.SharedArrays`
+            created by the main process.
+        """
+        _logger.debug("Attaching shared memory in worker {}".format(self.identity))
+        self.detach_shared_memory()
+        self.shared = SharedArrays.attach(spec)
+
+    def detach_shared_memory(self):
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    def _get_pixel_data(self, name):
+        if name in self.value_dict:
+            return self.value_dict.pop(name)
+        return self.shared.arrays[name][self.ind]
+
+    def _has_pixel_data(self, name):
+        return name in self.value_dict or (
+            self.shared is not None and name in self.shared.arrays
+        )
+
+    def _write_shared_results(self, result):
+        arrays = self.shared.arrays
+        for key, value in result.items():
+            if key in arrays:
+                arrays[key][self.ind] = value
+        for component in self.model:
+            active = component.name in result["components"]
+            key = component.name + "._active_array"
+            if key in arrays:
+                arrays[key][self.ind] = active
+            if active:
+                for par_name, par_map in result["components"][component.name].items():
+                    arrays[f"{component.name}.{par_name}.map"][self.ind] = np.reshape(
+                        par_map, ()
+                    )
 
     def set_optional_names(self, optional_names):
         self.optional_names = optional_names
@@ -163,6 +212,23 @@ def reset(self):
         self.best_dof = np.inf
 
     def run_pixel(self, ind, value_dict):
+        return self._send(self._run_pixel(ind, value_dict))
+
+    def run_pixels(self, jobs):
+        """Fit several pixels and send all their results in a single message.
+
+        Parameters
+        ----------
+        jobs : list of tuple
+            The ``(ind, value_dict)`` pairs of the pixels to fit.
+        """
+        results = []
+        for ind, value_dict in jobs:
+            _, (_, ind, result, isgood) = self._run_pixel(ind, value_dict)
+            results.append((ind, result, isgood))
+        return self._send(("results", (self.identity, results)))
+
+    def _run_pixel(self, ind, value_dict):
         self.reset()
         self.ind = ind
         self.value_dict = value_dict
@@ -178,25 +244,25 @@ def run_pixel(self, ind, value_dict):
             self.fitting_kwargs["min_function_grad"] = cloudpickle.loads(
                 self.fitting_kwargs["min_function_grad"]
             )
-        self.model.signal.data[:] = self.value_dict.pop("signal.data")
+        self.model.signal.data[:] = self._get_pixel_data("signal.data")
 
         if self.model.signal.metadata.has_item("Signal.Noise_properties.variance"):
             var = self.model.signal.metadata.Signal.Noise_properties.variance
             if isinstance(var, BaseSignal):
-                var.data[:] = self.value_dict.pop("variance.data")
+                var.data[:] = self._get_pixel_data("variance.data")
 
-        if "low_loss.data" in self.value_dict:
-            self.model.low_loss.data[:] = self.value_dict.pop("low_loss.data")
+        if self._has_pixel_data("low_loss.data"):
+            self.model.low_loss.data[:] = self._get_pixel_data("low_loss.data")
 
         for component_comb in self.generate_component_combinations():
             good_fit = self.fit(component_comb)
 
             if good_fit:
                 if len(self.optional_names) == 0:
-                    return self.send_results(current=True)
+                    return self._get_results(current=True)
                 else:
                     self.compare_models()
-        return self.send_results()
+        return self._get_results()
 
     def _collect_values(self):
         result = {
@@ -226,6 +292,9 @@ def compare_models(self):
                 self.parameters[k] = getattr(self.model, k).data[0]
 
     def send_results(self, current=False):
+        return self._send(self._get_results(current))
+
+    def _get_results(self, current=False):
         if current:
             self.best_values = self._collect_values()
             for k in self.parameters.keys():
@@ -235,13 +304,18 @@ def send_results(self, current=False):
             result = {k + ".data": np.array(v) for k, v in self.parameters.items()}
             result["components"] = self.best_values
             found_solution = True
+            if self.shared is not None:
+                self._write_shared_results(result)
+                result = None
         else:
             _logger.debug(
                 "we don't have a good result in worker " "{}".format(self.identity)
             )
             result = None
             found_solution = False
-        to_send = ("result", (self.identity, self.ind, result, found_solution))
+        return ("result", (self.identity, self.ind, result, found_solution))
+
+    def _send(self, to_send):
         if self.individual_queue is None:
             return to_send
         self.result_queue.put(to_send)
@@ -255,6 +329,7 @@ def start_listening(self):
 
     def stop_listening(self):
         self._listening = False
+        self.detach_shared_memory()
 
     def parse(self, result):
         function = result
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+# Copyright 2007-2024 The HyperSpy developers
+#
+# This file is part of HyperSpy.
+#
+# HyperSpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HyperSpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
+
+import logging
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from hyperspy.signal import BaseSignal
+
+_logger = logging.getLogger(__name__)
+
+
+def _get_result_signal_names(model):
+    """Return the names of the model signals, such as ``chisq`` and ``dof``,
+    which are sent back by the workers with the results of each pixel."""
+    return [
+        k.lstrip("_")
+        for k, v in model.__dict__.items()
+        if isinstance(v, BaseSignal)
+        and k.lstrip("_") not in ["signal", "image", "spectrum", "low_loss"]
+    ]
+
+
+class SharedArrays:
+    """Collection of numpy arrays stored in shared memory blocks.
+
+    The arrays are created in the main process with :meth:`add` and the
+    workers access them with :meth:`attach`, without copying the data, using
+    the description given by :attr:`spec`.
+
+    Attributes
+    ----------
+    arrays : dict
+        The numpy arrays, viewing the shared memory blocks, by name.
+    """
+
+    def __init__(self):
+        self.arrays = {}
+        self._blocks = {}
+
+    def add(self, name, array):
+        """Copy an array to a new shared memory block.
+
+        Parameters
+        ----------
+        name : str
+            The name of the array.
+        array : numpy.ndarray or dask.array.Array
+            The array to copy.
+
+        Returns
+        -------
+        numpy.ndarray
+            The array viewing the shared memory block.
+        """
+        array = np.asarray(array)
+        block = SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        shared[...] = array
+        self._blocks[name] = block
+        self.arrays[name] = shared
+        return shared
+
+    @property
+    def spec(self):
+        """dict: The name of the shared memory block, the shape and the dtype
+        of each array, to be sent to the workers."""
+        return {
+            name: (self._blocks[name].name, array.shape, array.dtype)
+            for name, array in self.arrays.items()
+        }
+
+    @classmethod
+    def attach(cls, spec):
+        """Access the arrays described by ``spec`` from another process.
+
+        Parameters
+        ----------
+        spec : dict
+            The :attr:`spec` of the :class:`SharedArrays` created in the main
+            process.
+
+        Returns
+        -------
+        SharedArrays
+        """
+        shared = cls()
+        for name, (block_name, shape, dtype) in spec.items():
+            block = SharedMemory(name=block_name)
+            shared._blocks[name] = block
+            shared.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        return shared
+
+    def close(self):
+        """Release the access to the shared memory blocks. The arrays must not
+        be used afterwards."""
+        self.arrays.clear()
+        for name, block in self._blocks.items():
+            try:
+                block.close()
+            except BufferError:
+                # Another view of the array is still alive, the memory is
+                # released when it is garbage collected
+                _logger.debug(f"The shared array {name} is still in use.")
+
+    def unlink(self):
+        """Close and destroy the shared memory blocks. Only the process which
+        created the blocks should call this method."""
+        blocks = list(self._blocks.values())
+        self.close()
+        for block in blocks:
+            block.unlink()
+        self._blocks.clear()
+
+
+def share_model_arrays(model):
+    """Copy the data required by the SAMFire workers to shared memory and
+    replace the parameter maps, the active arrays of the components and the
+    result signals (``chisq``, ``dof``) of the model by views of the shared
+    memory, so that the workers can write their results directly to the model.
+
+    Parameters
+    ----------
+    model : :class:`~.model.BaseModel`
+
+    Returns
+    -------
+    SharedArrays
+        The shared arrays, to be released with :func:`restore_model_arrays`.
+    """
+    shared = SharedArrays()
+    signal = model.signal
+    _logger.debug("Copying the signal data to shared memory")
+    shared.add("signal.data", signal.data)
+    if signal.metadata.has_item("Signal.Noise_properties.variance"):
+        var = signal.metadata.Signal.Noise_properties.variance
+        if isinstance(var, BaseSignal):
+            shared.add("variance.data", var.data)
+    if getattr(model, "low_loss", None) is not None:
+        shared.add("low_loss.data", model.low_loss.data)
+    for name in _get_result_signal_names(model):
+        result_signal = getattr(model, name)
+        result_signal.data = shared.add(name + ".data", result_signal.data)
+    for component in model:
+        for parameter in component.parameters:
+            parameter.map = shared.add(
+                f"{component.name}.{parameter.name}.map", parameter.map
+            )
+        if component.active_is_multidimensional:
+            component._active_array = shared.add(
+                f"{component.name}._active_array", component._active_array
+            )
+    return shared
+
+
+def restore_model_arrays(model, shared):
+    """Replace the views of the shared memory of the model by copies and
+    destroy the shared memory blocks.
+
+    Parameters
+    ----------
+    model : :class:`~.model.BaseModel`
+    shared : SharedArrays
+        The shared arrays returned by :func:`share_model_arrays`.
+    """
+    for name in _get_result_signal_names(model):
+        result_signal = getattr(model, name)
+        result_signal.data = result_signal.data.copy()
+    for component in model:
+        for parameter in component.parameters:
+            parameter.map = parameter.map.copy()
+        if component._active_array is not None:
+            component._active_array = component._active_array.copy()
+    shared.unlink()
@@ -108,6 +108,24 @@ def update(self, ind, isgood):
             self._update_marker(ind)
         self._update_database(ind, count)
 
+    def update_batch(self, inds, isgood):
+        """Updates the database and marker with the results of several pixels
+        at once. The SAMFire count must already include all the pixels.
+
+        Parameters
+        ----------
+        inds : list of tuple
+            the indices with new results
+        isgood : list of bool
+            if the fit of each pixel was successful.
+        """
+        count = self.samf.count - len(inds)
+        for ind, good in zip(inds, isgood):
+            count += 1
+            if good:
+                self._update_marker(ind)
+            self._update_database(ind, count)
+
     def __repr__(self):
         return self.name
 
@@ -478,6 +496,26 @@ def _package_values(self):
             ans[component.name] = component_dict
         return ans
 
+    def update_batch(self, inds, isgood):
+        """Updates the database and marker with the results of several pixels
+        at once. The database is updated at most once, if the count reached a
+        multiple of ``update_every`` with these pixels.
+
+        Parameters
+        ----------
+        inds : list of tuple
+            the indices with new results
+        isgood : list of bool
+            if the fit of each pixel was successful.
+        """
+        count = self.samf.count
+        for ind, good in zip(inds, isgood):
+            if good:
+                self._update_marker(ind)
+        every = self.samf.update_every
+        if any(not c % every for c in range(count - len(inds) + 1, count + 1)):
+            self._update_database(None, 0)
+
     def _update_database(self, ind, count):
         """
         Updates the database with current values
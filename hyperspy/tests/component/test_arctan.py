@@ -17,8 +17,10 @@
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
 import numpy as np
+import pytest
 
 from hyperspy.components1d import Arctan
+from hyperspy.signals import Signal1D
 
 
 def test_function():
@@ -29,3 +31,20 @@ def test_function():
     np.testing.assert_allclose(g.function(0), -11.07148718)
     np.testing.assert_allclose(g.function(1), 0)
     np.testing.assert_allclose(g.function(1e4), 10 * np.pi / 2, 1e-4)
+
+
+@pytest.mark.parametrize("lazy", (True, False))
+def test_estimate_parameters(lazy):
+    g1 = Arctan(A=2, k=0.5, x0=1)
+    s = Signal1D(np.empty((3, 1000)))
+    axis = s.axes_manager.signal_axes[0]
+    axis.scale = 0.1
+    axis.offset = -50
+    s.data[:] = g1.function(axis.axis)
+    if lazy:
+        s = s.as_lazy()
+    g2 = Arctan()
+    assert g2.estimate_parameters(s, axis.low_value, axis.high_value)
+    np.testing.assert_allclose(g2.A.map["values"], g1.A.value, rtol=0.05)
+    np.testing.assert_allclose(g2.k.map["values"], g1.k.value, rtol=0.05)
+    np.testing.assert_allclose(g2.x0.map["values"], g1.x0.value, atol=0.05)
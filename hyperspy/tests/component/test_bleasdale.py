@@ -20,6 +20,7 @@
 import pytest
 
 from hyperspy.components1d import Bleasdale
+from hyperspy.signals import Signal1D
 
 
 def test_function():
@@ -44,3 +45,20 @@ def test_module_error():
         Bleasdale(module="numpy")
     with pytest.raises(ValueError):
         Bleasdale(module="scipy")
+
+
+@pytest.mark.parametrize("lazy", (True, False))
+def test_estimate_parameters(lazy):
+    pytest.importorskip("numexpr")
+    g1 = Bleasdale(a=1, b=2, c=0.5)
+    s = Signal1D(np.empty((3, 100)))
+    axis = s.axes_manager.signal_axes[0]
+    axis.scale = 0.1
+    axis.offset = -1
+    s.data[:] = g1.function(axis.axis)
+    if lazy:
+        s = s.as_lazy()
+    g2 = Bleasdale(c=0.5)
+    assert g2.estimate_parameters(s, axis.low_value, axis.high_value)
+    np.testing.assert_allclose(g2.a.map["values"], g1.a.value)
+    np.testing.assert_allclose(g2.b.map["values"], g1.b.value)
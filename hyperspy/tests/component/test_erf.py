@@ -17,8 +17,10 @@
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
 import numpy as np
+import pytest
 
 from hyperspy.components1d import Erf
+from hyperspy.signals import Signal1D
 
 
 def test_function():
@@ -29,3 +31,29 @@ def test_function():
     assert g.function(3) == 0.0
     np.testing.assert_allclose(g.function(15), 0.5)
     np.testing.assert_allclose(g.function(1.951198), -0.2, rtol=1e-6)
+
+
+@pytest.mark.parametrize("lazy", (True, False))
+@pytest.mark.parametrize("binned", (True, False))
+@pytest.mark.parametrize("only_current", (True, False))
+@pytest.mark.parametrize("A", (5, -5))
+def test_estimate_parameters(A, only_current, binned, lazy):
+    g1 = Erf(A=abs(A), sigma=np.sign(A) * 2, origin=1)
+    s = Signal1D(np.empty((3, 400)))
+    axis = s.axes_manager.signal_axes[0]
+    axis.scale = 0.1
+    axis.offset = -20
+    axis.is_binned = binned
+    s.data[:] = g1.function(axis.axis) * (axis.scale if binned else 1)
+    if lazy:
+        s = s.as_lazy()
+    g2 = Erf()
+    assert g2.estimate_parameters(
+        s, axis.low_value, axis.high_value, only_current=only_current
+    )
+    np.testing.assert_allclose(g2.A.value, g1.A.value, rtol=1e-3)
+    np.testing.assert_allclose(g2.sigma.value, g1.sigma.value, rtol=1e-3)
+    np.testing.assert_allclose(g2.origin.value, g1.origin.value, atol=1e-3)
+    if not only_current:
+        np.testing.assert_allclose(g2.A.map["values"], g1.A.value, rtol=1e-3)
+        assert g2.A.map["is_set"].all()
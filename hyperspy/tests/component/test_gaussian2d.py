@@ -19,9 +19,11 @@
 import math
 
 import numpy as np
+import pytest
 from pytest import approx
 
 from hyperspy.components2d import Gaussian2D
+from hyperspy.signals import Signal2D
 
 sigma2fwhm = 2 * np.sqrt(2 * np.log(2))
 
@@ -130,3 +132,40 @@ def test_properties():
     g.rotation_angle.value = angle
     np.testing.assert_allclose(g.rotation_angle_wrapped, angle)
     np.testing.assert_allclose(g.rotation_major_axis, angle - np.pi / 2)
+
+
+@pytest.mark.parametrize("lazy", (True, False))
+@pytest.mark.parametrize("only_current", (True, False))
+def test_estimate_parameters(only_current, lazy):
+    g1 = Gaussian2D(A=10, sigma_x=2, sigma_y=3, centre_x=1, centre_y=-1)
+    x = np.arange(-20, 20, 0.5)
+    X, Y = np.meshgrid(x, x)
+    s = Signal2D(np.tile(g1.function(X, Y), (3, 1, 1)))
+    for axis in s.axes_manager.signal_axes:
+        axis.offset, axis.scale = -20, 0.5
+    if lazy:
+        s = s.as_lazy()
+    g2 = Gaussian2D()
+    assert g2.estimate_parameters(s, only_current=only_current)
+    for parameter in g1.parameters:
+        np.testing.assert_allclose(
+            getattr(g2, parameter.name).value, parameter.value, rtol=1e-6
+        )
+    if not only_current:
+        np.testing.assert_allclose(g2.A.map["values"], g1.A.value)
+        assert g2.A.map["is_set"].all()
+
+
+def test_estimate_parameters_range():
+    g1 = Gaussian2D(A=10, sigma_x=1, sigma_y=1, centre_x=-5, centre_y=5)
+    g2 = Gaussian2D(A=10, sigma_x=1, sigma_y=1, centre_x=5, centre_y=-5)
+    x = np.arange(-20, 20, 0.5)
+    X, Y = np.meshgrid(x, x)
+    s = Signal2D(g1.function(X, Y) + g2.function(X, Y))
+    for axis in s.axes_manager.signal_axes:
+        axis.offset, axis.scale = -20, 0.5
+    g3 = Gaussian2D()
+    g3.estimate_parameters(s, x1=0, x2=20, y1=-20, y2=0, only_current=True)
+    assert g3.centre_x.value == approx(5)
+    assert g3.centre_y.value == approx(-5)
+    assert g3.A.value == approx(10)
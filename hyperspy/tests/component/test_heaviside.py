@@ -60,3 +60,18 @@ def test_not_sorted(self):
     #     np.testing.assert_array_almost_equal(
     #         c.n.grad(np.array([3, -0.1, 0])), np.array([1, 1, 1])
     #     )
+
+
+def test_estimate_parameters():
+    g1 = hs.model.components1D.HeavisideStep(A=2, n=1)
+    s = hs.signals.Signal1D(np.empty((3, 200)))
+    axis = s.axes_manager.signal_axes[0]
+    axis.scale = 0.1
+    axis.offset = -10
+    s.data[:] = g1.function(axis.axis)
+    g2 = hs.model.components1D.HeavisideStep()
+    assert g2.estimate_parameters(s, axis.low_value, axis.high_value)
+    np.testing.assert_allclose(g2.A.map["values"], g1.A.value)
+    np.testing.assert_allclose(g2.n.map["values"], g1.n.value, atol=axis.scale)
+    assert g2.estimate_parameters(s, axis.low_value, axis.high_value, only_current=True)
+    np.testing.assert_allclose(g2.A.value, g1.A.value)
@@ -17,8 +17,10 @@
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
 import numpy as np
+import pytest
 
 from hyperspy.components1d import Logistic
+from hyperspy.signals import Signal1D
 
 
 def test_function():
@@ -30,3 +32,22 @@ def test_function():
     np.testing.assert_allclose(g.function(10), 1)
     np.testing.assert_allclose(g.function(4), 1 / 3)
     np.testing.assert_allclose(g.function(0), 3.07209674e-06)
+
+
+@pytest.mark.parametrize("lazy", (True, False))
+@pytest.mark.parametrize("c", (2, -2))
+def test_estimate_parameters(c, lazy):
+    g1 = Logistic(a=3, c=c, origin=1)
+    s = Signal1D(np.empty((3, 200)))
+    axis = s.axes_manager.signal_axes[0]
+    axis.scale = 0.1
+    axis.offset = -10
+    s.data[:] = g1.function(axis.axis)
+    if lazy:
+        s = s.as_lazy()
+    g2 = Logistic(b=2)
+    assert g2.estimate_parameters(s, axis.low_value, axis.high_value)
+    np.testing.assert_allclose(g2.a.map["values"], g1.a.value, rtol=1e-3)
+    np.testing.assert_allclose(g2.b.map["values"], 1)
+    np.testing.assert_allclose(g2.c.map["values"], g1.c.value, rtol=0.01)
+    np.testing.assert_allclose(g2.origin.map["values"], g1.origin.value, atol=1e-3)
@@ -18,8 +18,10 @@
 
 
 import numpy as np
+import pytest
 
 from hyperspy.components1d import RC
+from hyperspy.signals import Signal1D
 
 
 def test_function():
@@ -30,3 +32,21 @@ def test_function():
     assert g.function(0) == 1
     np.testing.assert_allclose(g.function(50), 3)
     np.testing.assert_allclose(g.function(-3), 3 - 2 * np.e)
+
+
+@pytest.mark.parametrize("lazy", (True, False))
+@pytest.mark.parametrize("offset", (0, 3))
+def test_estimate_parameters(offset, lazy):
+    g1 = RC(Vmax=3, V0=1, tau=2)
+    s = Signal1D(np.empty((3, 400)))
+    axis = s.axes_manager.signal_axes[0]
+    axis.scale = 0.1
+    axis.offset = offset
+    s.data[:] = g1.function(axis.axis)
+    if lazy:
+        s = s.as_lazy()
+    g2 = RC()
+    assert g2.estimate_parameters(s, axis.low_value, axis.high_value)
+    np.testing.assert_allclose(g2.Vmax.map["values"], g1.Vmax.value, rtol=0.01)
+    np.testing.assert_allclose(g2.V0.map["values"], g1.V0.value, rtol=0.01)
+    np.testing.assert_allclose(g2.tau.map["values"], g1.tau.value, rtol=0.01)
@@ -136,3 +136,21 @@ def test_recreate_component(self, interpolate):
         assert m2[0].yscale._linear
         assert not m2[0].xscale._linear
         assert not m2[0].shift._linear
+
+
+@pytest.mark.parametrize("lazy", (True, False))
+@pytest.mark.parametrize("interpolate", (True, False))
+def test_estimate_parameters(interpolate, lazy):
+    pattern = hs.signals.Signal1D(np.sin(np.linspace(0, 3, 50)))
+    yscale = np.arange(6).reshape(2, 3)
+    s = hs.signals.Signal1D(yscale[..., np.newaxis] * pattern.data)
+    if lazy:
+        s = s.as_lazy()
+    fp = hs.model.components1D.ScalableFixedPattern(pattern, interpolate=interpolate)
+    axis = s.axes_manager.signal_axes[0]
+    assert fp.estimate_parameters(s, axis.low_value, axis.high_value)
+    np.testing.assert_allclose(fp.yscale.map["values"], yscale, atol=1e-10)
+    assert fp.yscale.map["is_set"].all()
+    s.axes_manager.indices = (2, 1)
+    assert fp.estimate_parameters(s, axis.low_value, axis.high_value, only_current=True)
+    np.testing.assert_allclose(fp.yscale.value, 5)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Copyright 2007-2024 The HyperSpy developers
+#
+# This file is part of HyperSpy.
+#
+# HyperSpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HyperSpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
+
+import numpy as np
+import pytest
+
+import hyperspy.api as hs
+from hyperspy.decorators import lazifyTestClass
+
+
+@lazifyTestClass
+class TestCompiledModel:
+    def setup_method(self, method):
+        rng = np.random.default_rng(1)
+        x = np.arange(0, 20, 0.1)
+        data = 50 * np.exp(-((x - 8) ** 2) / 2) + 30 * np.exp(-((x - 12) ** 2) / 2)
+        data = data + 2 + rng.normal(scale=0.1, size=(3, x.size))
+        s = hs.signals.Signal1D(data)
+        s.axes_manager[-1].scale = 0.1
+        self.s = s
+
+    def _create_model(self, modify=None):
+        m = self.s.create_model()
+        m.extend(
+            [
+                hs.model.components1D.GaussianHF(height=40, centre=8.2, fwhm=2),
+                hs.model.components1D.Gaussian(A=80, centre=11.8, sigma=1.2),
+                hs.model.components1D.Polynomial(order=1, a0=0, a1=1),
+            ]
+        )
+        if modify is not None:
+            modify(m)
+        return m
+
+    def _compare_with_not_compiled(self, modify=None, backend="numpy", **kwargs):
+        m = self._create_model(modify)
+        m.compile(backend=backend)
+        m2 = self._create_model(modify)
+        m.multifit(**kwargs)
+        m2.multifit(**kwargs)
+        for c, c2 in zip(m, m2):
+            for p, p2 in zip(c.parameters, c2.parameters):
+                np.testing.assert_allclose(
+                    p.map["values"], p2.map["values"], rtol=1e-5, atol=1e-6
+                )
+                np.testing.assert_allclose(
+                    p.map["std"], p2.map["std"], rtol=1e-3, atol=1e-6
+                )
+        np.testing.assert_allclose(m.chisq.data, m2.chisq.data, rtol=1e-5)
+        return m
+
+    @pytest.mark.parametrize("backend", ["numpy", "numexpr", "numba"])
+    @pytest.mark.parametrize("grad", ["fd", "analytical"])
+    def test_compiled_fit(self, backend, grad):
+        if backend != "numpy":
+            pytest.importorskip(backend)
+        self._compare_with_not_compiled(backend=backend, grad=grad)
+
+    @pytest.mark.parametrize("optimizer", ["trf", "L-BFGS-B"])
+    def test_compiled_fit_optimizer(self, optimizer):
+        self._compare_with_not_compiled(
+            optimizer=optimizer, grad="analytical", bounded=True
+        )
+
+    def test_model_function(self):
+        m = self._create_model()
+        m.compile()
+        m._check_compiled_model()
+        m._set_p0()
+        p0 = np.array(m.p0) * 1.1
+        compiled = m._model_function(p0)
+        jacobian = m._jacobian(p0, None)
+        m._compiled_model = None
+        np.testing.assert_allclose(compiled, m._model_function(p0))
+        np.testing.assert_allclose(jacobian, m._jacobian(p0, None))
+
+    def test_binned(self):
+        self.s.axes_manager[-1].is_binned = True
+        self._compare_with_not_compiled(grad="analytical")
+
+    def test_fixed_parameter(self):
+        def modify(m):
+            m[2].a1.free = False
+            m[2].a1.value = 0.1
+
+        m = self._compare_with_not_compiled(modify, grad="analytical")
+        np.testing.assert_allclose(m[2].a1.map["values"], 0.1)
+
+    def test_twin(self):
+        def modify(m):
+            m[1].centre.twin_function_expr = "x + 3.8"
+            m[1].centre.twin_inverse_function_expr = "x - 3.8"
+            m[1].centre.twin = m[0].centre
+
+        m = self._compare_with_not_compiled(modify)
+        np.testing.assert_allclose(
+            m[1].centre.map["values"], m[0].centre.map["values"] + 3.8
+        )
+
+    def test_recompile(self):
+        m = self._create_model()
+        m.compile()
+        m.fit()
+        assert len(m._compiled_functions) == 1
+        m[2].active = False
+        m.fit()
+        assert len(m._compiled_functions) == 2
+        m[2].active = True
+        m[1].sigma.free = False
+        m.fit()
+        assert len(m._compiled_functions) == 3
+        m[1].sigma.free = True
+        m.fit()
+        assert len(m._compiled_functions) == 3
+
+    def test_disable(self):
+        m = self._create_model()
+        m.compile()
+        m.compile(backend=None)
+        m.fit()
+        assert m._compiled_model is None
+
+    def test_not_supported_component(self):
+        m = self._create_model()
+        m.append(hs.model.components1D.Offset())
+        with pytest.raises(ValueError, match="Offset"):
+            m.compile()
+
+    def test_wrong_backend(self):
+        with pytest.raises(ValueError, match="backend"):
+            self._create_model().compile(backend="cython")
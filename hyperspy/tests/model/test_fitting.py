@@ -17,6 +17,7 @@
 # along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
 
 import logging
+from unittest import mock
 
 import numpy as np
 import pytest
@@ -29,6 +30,7 @@
 from hyperspy.decorators import lazifyTestClass
 
 TOL = 1e-5
+sigma2fwhm = 2 * np.sqrt(2 * np.log(2))
 
 
 def _create_toy_1d_gaussian_model(binned=True, weights=False, noise=False):
@@ -586,6 +588,495 @@ def test_autosave(self):
         m.multifit(autosave=True, autosave_every=1)
 
 
+@lazifyTestClass
+class TestMultifitBatch:
+    def setup_method(self, method):
+        rng = np.random.default_rng(1)
+        x = np.arange(0, 20, 0.1)
+        centre = rng.uniform(9, 11, size=(3, 4))
+        sigma = rng.uniform(0.8, 1.2, size=(3, 4))
+        data = 50 * np.exp(
+            -((x - centre[..., None]) ** 2) / (2 * sigma[..., None] ** 2)
+        )
+        data += 2 + rng.normal(scale=0.1, size=data.shape)
+        s = hs.signals.Signal1D(data)
+        s.axes_manager[-1].scale = 0.1
+        m = s.create_model()
+        m.extend(
+            [
+                hs.model.components1D.GaussianHF(height=40, centre=10, fwhm=2),
+                hs.model.components1D.Offset(),
+            ]
+        )
+        self.m = m
+        self.centre = centre
+        self.sigma = sigma
+
+    def _check_results(self, m):
+        np.testing.assert_allclose(m[0].centre.map["values"], self.centre, atol=0.01)
+        np.testing.assert_allclose(
+            m[0].fwhm.map["values"], self.sigma * sigma2fwhm, rtol=0.02
+        )
+        np.testing.assert_allclose(m[1].offset.map["values"], 2, atol=0.05)
+        for p in m[0].parameters + m[1].parameters:
+            assert p.map["is_set"].all()
+        assert np.all(m.dof.data == 4)
+
+    @pytest.mark.parametrize("grad", ["fd", "analytical"])
+    @pytest.mark.parametrize("batch_size", [1, 5, 100])
+    def test_batch_fit(self, grad, batch_size):
+        m = self.m
+        m.multifit(batch_size=batch_size, grad=grad)
+        self._check_results(m)
+
+    def test_batch_same_as_iterative(self):
+        m = self.m
+        m2 = m.signal.create_model()
+        m2.extend([c.__class__(**{p.name: p.value for p in c.parameters}) for c in m])
+        m.multifit(batch_size=4)
+        m2.multifit()
+        for c, c2 in zip(m, m2):
+            for p, p2 in zip(c.parameters, c2.parameters):
+                np.testing.assert_allclose(p.map["values"], p2.map["values"], rtol=1e-5)
+                np.testing.assert_allclose(p.map["std"], p2.map["std"], rtol=1e-3)
+        np.testing.assert_allclose(m.chisq.data, m2.chisq.data, rtol=1e-5)
+        np.testing.assert_allclose(m.dof.data, m2.dof.data)
+
+    def test_batch_fit_mask(self):
+        m = self.m
+        mask = np.zeros((3, 4), dtype=bool)
+        mask[1, 2] = True
+        m.multifit(batch_size=5, mask=mask)
+        assert not m[0].centre.map["is_set"][1, 2]
+        assert np.isnan(m.chisq.data[1, 2])
+        np.testing.assert_allclose(
+            m[0].centre.map["values"][~mask], self.centre[~mask], atol=0.01
+        )
+
+    def test_batch_fit_bounded(self):
+        m = self.m
+        m[0].centre.bmax = 9.5
+        m[0].centre.value = 9
+        m.multifit(batch_size=5, bounded=True)
+        assert np.all(m[0].centre.map["values"] <= 9.5)
+
+    def test_batch_fit_variance(self):
+        m = self.m
+        m.signal.set_noise_variance(0.01)
+        m.multifit(batch_size=5)
+        self._check_results(m)
+        np.testing.assert_allclose(np.nanmean(m.red_chisq.data), 1, rtol=0.2)
+
+    def test_batch_fit_twin(self):
+        m = self.m
+        g2 = hs.model.components1D.GaussianHF(height=0, centre=15, fwhm=2)
+        m.append(g2)
+        g2.height.free = False
+        g2.fwhm.twin = m[0].fwhm
+        m.multifit(batch_size=5)
+        np.testing.assert_allclose(g2.fwhm.map["values"], m[0].fwhm.map["values"])
+        # g2.centre is free
+        assert np.all(m.dof.data == 5)
+
+    def test_batch_fit_fetch_only_fixed(self):
+        m = self.m
+        m[0].centre.map["values"][:] = 100
+        m[0].centre.map["is_set"][:] = True
+        m.multifit(batch_size=5, fetch_only_fixed=True)
+        self._check_results(m)
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"optimizer": "trf"},
+            {"loss_function": "huber"},
+            {"grad": None},
+            {"maxiter": 10},
+            {"optimizer": "lstsq"},
+        ],
+    )
+    def test_batch_fit_unsupported(self, kwargs):
+        with pytest.raises(ValueError):
+            self.m.multifit(batch_size=5, **kwargs)
+
+    def test_batch_fit_active_is_multidimensional(self):
+        m = self.m
+        m[1].active_is_multidimensional = True
+        m[1]._active_array[0, 0] = False
+        with pytest.warns(UserWarning, match="active state varies"):
+            m.multifit(batch_size=5)
+        assert not m[1].offset.map["is_set"][0, 0]
+        np.testing.assert_allclose(m[0].centre.map["values"], self.centre, atol=0.1)
+
+
+@lazifyTestClass
+class TestMultifitParallel:
+    def setup_method(self, method):
+        rng = np.random.default_rng(1)
+        x = np.arange(0, 20, 0.1)
+        centre = rng.uniform(9, 11, size=(3, 4))
+        data = 50 * np.exp(-((x - centre[..., None]) ** 2) / 2)
+        data += 2 + rng.normal(scale=0.1, size=data.shape)
+        s = hs.signals.Signal1D(data)
+        s.axes_manager[-1].scale = 0.1
+        m = s.create_model()
+        m.extend(
+            [
+                hs.model.components1D.GaussianHF(height=40, centre=10, fwhm=2),
+                hs.model.components1D.Offset(),
+            ]
+        )
+        self.m = m
+        self.centre = centre
+
+    @pytest.mark.parametrize("scheduler", ["processes", "threads"])
+    @pytest.mark.parametrize("num_workers", [1, 2, 5])
+    def test_parallel_same_as_sequential(self, scheduler, num_workers):
+        m = self.m
+        m2 = m.signal.create_model()
+        m2.extend([c.__class__(**{p.name: p.value for p in c.parameters}) for c in m])
+        m.multifit(num_workers=num_workers, scheduler=scheduler)
+        m2.multifit()
+        for c, c2 in zip(m, m2):
+            for p, p2 in zip(c.parameters, c2.parameters):
+                assert p.map["is_set"].all()
+                np.testing.assert_allclose(p.map["values"], p2.map["values"], rtol=1e-5)
+                np.testing.assert_allclose(p.map["std"], p2.map["std"], rtol=1e-3)
+        np.testing.assert_allclose(m.chisq.data, m2.chisq.data, rtol=1e-5)
+        np.testing.assert_allclose(m.dof.data, m2.dof.data)
+
+    @pytest.mark.parametrize("iterpath", ["flyback", "serpentine"])
+    def test_parallel_mask(self, iterpath):
+        m = self.m
+        mask = np.zeros((3, 4), dtype=bool)
+        mask[1, 2] = True
+        m.multifit(num_workers=2, scheduler="threads", mask=mask, iterpath=iterpath)
+        assert not m[0].centre.map["is_set"][1, 2]
+        assert np.isnan(m.chisq.data[1, 2])
+        np.testing.assert_allclose(
+            m[0].centre.map["values"][~mask], self.centre[~mask], atol=0.01
+        )
+
+    def test_parallel_variance_twin(self):
+        m = self.m
+        m.signal.set_noise_variance(
+            hs.signals.Signal1D(np.full(m.signal.data.shape, 0.01))
+        )
+        g2 = hs.model.components1D.GaussianHF(height=0, centre=15, fwhm=2)
+        m.append(g2)
+        g2.height.free = False
+        g2.fwhm.twin = m[0].fwhm
+        m.multifit(num_workers=2)
+        np.testing.assert_allclose(m[0].centre.map["values"], self.centre, atol=0.01)
+        np.testing.assert_allclose(g2.fwhm.map["values"], m[0].fwhm.map["values"])
+        np.testing.assert_allclose(np.nanmean(m.red_chisq.data), 1, rtol=0.2)
+
+    def test_parallel_autosave(self):
+        self.m.multifit(num_workers=2, autosave=True)
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"num_workers": 0}, {"num_workers": 2, "scheduler": "dask"}]
+    )
+    def test_parallel_invalid(self, kwargs):
+        with pytest.raises(ValueError):
+            self.m.multifit(**kwargs)
+
+
+class TestMultifitMapsOnDisk:
+    def setup_method(self, method):
+        rng = np.random.default_rng(1)
+        x = np.arange(0, 20, 0.1)
+        centre = rng.uniform(9, 11, size=(4, 6))
+        data = 50 * np.exp(-((x - centre[..., None]) ** 2) / 2)
+        data += 2 + rng.normal(scale=0.1, size=data.shape)
+        s = hs.signals.Signal1D(data)
+        s.axes_manager[-1].scale = 0.1
+        s = s.as_lazy()
+        s.rechunk(nav_chunks=(2, 3))
+        m = s.create_model()
+        m.extend(
+            [
+                hs.model.components1D.GaussianHF(height=40, centre=10, fwhm=2),
+                hs.model.components1D.Offset(),
+            ]
+        )
+        self.m = m
+        self.centre = centre
+
+    @pytest.mark.parametrize("num_workers", [None, 2])
+    def test_maps_on_disk(self, tmp_path, num_workers):
+        m = self.m
+        m2 = m.signal.create_model()
+        m2.extend([c.__class__(**{p.name: p.value for p in c.parameters}) for c in m])
+        m.multifit(maps_dir=tmp_path, num_workers=num_workers)
+        m2.multifit()
+        assert (tmp_path / "0_GaussianHF_centre.npy").is_file()
+        assert (tmp_path / "chisq.npy").is_file()
+        for c, c2 in zip(m, m2):
+            for p, p2 in zip(c.parameters, c2.parameters):
+                assert isinstance(p.map, np.memmap)
+                assert p.map["is_set"].all()
+                np.testing.assert_allclose(p.map["values"], p2.map["values"], rtol=1e-5)
+        np.testing.assert_allclose(m.chisq.data, m2.chisq.data, rtol=1e-5)
+        np.testing.assert_allclose(m.dof.data, m2.dof.data)
+        centre = np.load(tmp_path / "0_GaussianHF_centre.npy")
+        np.testing.assert_allclose(centre["values"], self.centre, atol=0.01)
+
+    def test_maps_on_disk_mask(self, tmp_path):
+        m = self.m
+        mask = np.zeros((4, 6), dtype=bool)
+        mask[1, 2] = True
+        m.multifit(maps_dir=tmp_path, mask=mask)
+        assert not m[0].centre.map["is_set"][1, 2]
+        np.testing.assert_allclose(
+            m[0].centre.map["values"][~mask], self.centre[~mask], atol=0.01
+        )
+
+    def test_maps_on_disk_reused(self, tmp_path):
+        m = self.m
+        m.multifit(maps_dir=tmp_path)
+        maps = [p.map for c in m for p in c.parameters]
+        m.multifit(maps_dir=tmp_path)
+        for map_, p in zip(maps, [p for c in m for p in c.parameters]):
+            assert p.map is map_
+
+    def test_maps_on_disk_not_lazy(self, tmp_path):
+        m = self.m
+        m.signal.compute()
+        m.multifit(maps_dir=tmp_path)
+        assert isinstance(m[0].centre.map, np.memmap)
+        np.testing.assert_allclose(m[0].centre.map["values"], self.centre, atol=0.01)
+
+    def test_parameter_as_signal(self, tmp_path):
+        m = self.m
+        m.multifit(maps_dir=tmp_path)
+        s = m[0].centre.as_signal()
+        assert s._lazy
+        np.testing.assert_allclose(s.data.compute(), m[0].centre.map["values"])
+        assert s.get_noise_variance()._lazy
+
+    @pytest.mark.parametrize("out_of_range_to_nan", [True, False])
+    def test_model_as_signal(self, tmp_path, out_of_range_to_nan):
+        m = self.m
+        m.set_signal_range(2, 18)
+        m.multifit()
+        expected = m.as_signal(out_of_range_to_nan=out_of_range_to_nan)
+        expected_component = m.as_signal(
+            component_list=[0], out_of_range_to_nan=out_of_range_to_nan
+        )
+        m._store_maps_on_disk(tmp_path)
+        s = m.as_signal(out_of_range_to_nan=out_of_range_to_nan)
+        assert s._lazy
+        assert s.data.chunks[:2] == m.signal.data.chunks[:2]
+        np.testing.assert_allclose(s.data.compute(), expected.data)
+        s = m.as_signal(component_list=[0], out_of_range_to_nan=out_of_range_to_nan)
+        np.testing.assert_allclose(s.data.compute(), expected_component.data)
+
+
+class TestMultifitCheckpoint:
+    def setup_method(self, method):
+        rng = np.random.default_rng(1)
+        x = np.arange(0, 20, 0.1)
+        centre = rng.uniform(9, 11, size=(3, 4))
+        data = 50 * np.exp(-((x - centre[..., None]) ** 2) / 2)
+        data += 2 + rng.normal(scale=0.1, size=data.shape)
+        s = hs.signals.Signal1D(data)
+        s.axes_manager[-1].scale = 0.1
+        self.s = s
+
+    def _create_model(self):
+        m = self.s.create_model()
+        m.extend(
+            [
+                hs.model.components1D.GaussianHF(height=40, centre=10, fwhm=2),
+                hs.model.components1D.Offset(),
+            ]
+        )
+        return m
+
+    @staticmethod
+    def _assert_maps_equal(m, m2):
+        for c, c2 in zip(m, m2):
+            for p, p2 in zip(c.parameters, c2.parameters):
+                np.testing.assert_equal(p.map, p2.map)
+        np.testing.assert_equal(m.chisq.data, m2.chisq.data)
+        np.testing.assert_equal(m.dof.data, m2.dof.data)
+
+    @pytest.mark.parametrize(
+        "kwargs", [{}, {"num_workers": 2}, {"batch_size": 5}, {"autosave_every": 1}]
+    )
+    def test_checkpoint(self, tmp_path, kwargs):
+        fn = tmp_path / "fit.checkpoint"
+        m = self._create_model()
+        m.multifit(autosave=fn, **kwargs)
+        assert fn.is_file()
+        m2 = self._create_model()
+        m2.multifit(resume=fn)
+        self._assert_maps_equal(m, m2)
+
+    def test_append_only(self, tmp_path):
+        fn = tmp_path / "fit.checkpoint"
+        m = self._create_model()
+        m.multifit(autosave=fn, autosave_every=5)
+        with open(fn, "rb") as f:
+            header = np.load(f)
+            assert header.size == 4
+            indices = [np.load(f)]
+            np.load(f)
+            indices.append(np.load(f))
+            np.load(f)
+            indices.append(np.load(f))
+            record = np.load(f)
+            assert f.read() == b""
+        # 12 positions in records of 5 positions, each position stored once
+        assert [i.size for i in indices] == [5, 5, 2]
+        np.testing.assert_array_equal(np.sort(np.concatenate(indices)), np.arange(12))
+        assert record.shape == (2, 2 * 4 + 2)
+
+    def test_resume(self, tmp_path):
+        fn = tmp_path / "fit.checkpoint"
+        # Interrupted fit
+        mask = np.zeros((3, 4), dtype=bool)
+        mask[1:] = True
+        m = self._create_model()
+        m.multifit(autosave=fn, mask=mask)
+        assert m[0].centre.map["is_set"].sum() == 4
+
+        m2 = self._create_model()
+        with mock.patch.object(m2, "fit", wraps=m2.fit) as mocked:
+            m2.multifit(resume=fn)
+        assert mocked.call_count == 8
+        np.testing.assert_equal(m2[0].centre.map[:1], m[0].centre.map[:1])
+        assert m2[0].centre.map["is_set"].all()
+
+        # The checkpoint contains all the positions now
+        m3 = self._create_model()
+        with mock.patch.object(m3, "fit", wraps=m3.fit) as mocked:
+            m3.multifit(resume=fn)
+        mocked.assert_not_called()
+        self._assert_maps_equal(m2, m3)
+
+    def test_truncated_record(self, tmp_path, caplog):
+        fn = tmp_path / "fit.checkpoint"
+        m = self._create_model()
+        m.multifit(autosave=fn, autosave_every=6)
+        size = fn.stat().st_size
+        with open(fn, "r+b") as f:
+            f.truncate(size - 10)
+        m2 = self._create_model()
+        with caplog.at_level(logging.WARNING):
+            m2.multifit(resume=fn)
+        assert "incomplete record" in caplog.text
+        # The positions of the discarded record have been fitted again
+        for c, c2 in zip(m, m2):
+            for p, p2 in zip(c.parameters, c2.parameters):
+                np.testing.assert_allclose(p.map["values"], p2.map["values"], rtol=1e-4)
+        assert fn.stat().st_size == size
+
+    def test_wrong_model(self, tmp_path):
+        fn = tmp_path / "fit.checkpoint"
+        m = self._create_model()
+        m.multifit(autosave=fn)
+        m.remove(1)
+        with pytest.raises(ValueError, match="doesn't match"):
+            m.multifit(resume=fn)
+
+    def test_temporary_file_deleted(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        m = self._create_model()
+        m.multifit(autosave=True, autosave_every=1)
+        assert not list(tmp_path.iterdir())
+
+
+class TestFitDiagnostics:
+    def setup_method(self, method):
+        rng = np.random.default_rng(1)
+        x = np.arange(0, 20, 0.1)
+        centre = rng.uniform(9, 11, size=(3, 4))
+        data = 50 * np.exp(-((x - centre[..., None]) ** 2) / 2)
+        data += 2 + rng.normal(scale=0.1, size=data.shape)
+        s = hs.signals.Signal1D(data)
+        s.axes_manager[-1].scale = 0.1
+        m = s.create_model()
+        m.extend(
+            [
+                hs.model.components1D.GaussianHF(height=40, centre=10, fwhm=2),
+                hs.model.components1D.Offset(),
+            ]
+        )
+        self.m = m
+
+    def test_initial(self):
+        d = self.m.fit_diagnostics
+        assert d.nfev.data.shape == (3, 4)
+        assert np.isnan(d.time.data).all()
+        assert not d.success.data.any()
+        assert "Fitted positions: 0 / 12" in repr(d)
+
+    @pytest.mark.parametrize("optimizer", ["lm", "trf", "L-BFGS-B"])
+    def test_fit(self, optimizer):
+        m = self.m
+        m.axes_manager.indices = (1, 2)
+        m.fit(optimizer=optimizer)
+        d = m.fit_diagnostics
+        assert d.nfev.data[2, 1] > 0
+        assert d.time.data[2, 1] > 0
+        assert d.success.data[2, 1]
+        assert np.isnan(d.njev.data[2, 1]) == (optimizer == "lm")
+        assert np.isnan(d.time.data).sum() == 11
+
+    @pytest.mark.parametrize(
+        "kwargs", [{}, {"batch_size": 5}, {"num_workers": 2}, {"optimizer": "trf"}]
+    )
+    def test_multifit(self, kwargs):
+        m = self.m
+        m.multifit(**kwargs)
+        d = m.fit_diagnostics
+        assert (d.nfev.data > 0).all()
+        assert (d.time.data > 0).all()
+        assert d.success.data.all()
+        assert not d.at_bounds.data.any()
+        summary = d.summary()
+        assert "Fitted positions: 12 / 12" in summary
+        assert "Unsuccessful fits: 0 (0.0%)" in summary
+
+    @pytest.mark.parametrize("kwargs", [{}, {"num_workers": 2}])
+    def test_mask(self, kwargs):
+        m = self.m
+        mask = np.zeros((3, 4), dtype=bool)
+        mask[0] = True
+        m.multifit(mask=mask, **kwargs)
+        time = m.fit_diagnostics.time.data
+        assert np.isnan(time[mask]).all()
+        assert (time[~mask] > 0).all()
+
+    @pytest.mark.parametrize("kwargs", [{}, {"batch_size": 5}])
+    def test_at_bounds(self, kwargs):
+        m = self.m
+        m[0].fwhm.bmax = 1.5
+        m[0].fwhm.bmin = 0.1
+        m.multifit(bounded=True, **kwargs)
+        assert m.fit_diagnostics.at_bounds.data.all()
+        assert "Fits with parameters at bounds: 12 (100.0%)" in str(m.fit_diagnostics)
+
+    def test_linear(self):
+        m = self.m
+        m.set_parameters_not_free(only_nonlinear=True)
+        m.multifit(optimizer="lstsq")
+        d = m.fit_diagnostics
+        assert d.success.data.all()
+        assert (d.time.data > 0).all()
+        assert np.isnan(d.nfev.data).all()
+
+    def test_maps_on_disk(self, tmp_path):
+        m = self.m
+        m.multifit(maps_dir=tmp_path)
+        assert isinstance(m.fit_diagnostics.nfev.data, np.memmap)
+        nfev = np.load(tmp_path / "fit_diagnostics_nfev.npy")
+        np.testing.assert_array_equal(nfev, m.fit_diagnostics.nfev.data)
+        assert (nfev > 0).all()
+
+
 def _generate():
     for i in range(3):
         yield (i, i)
@@ -329,7 +329,8 @@ def test_active_is_multidimensional(self):
         component._active_array[10] = False
         m[1].active = False
         assert component.active
-        with pytest.warns(UserWarning, match="active components that are not active"):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
             with pytest.raises(RuntimeError):
                 # when we hit the navigation position, where the component
                 # is not active
@@ -342,7 +343,8 @@ def test_set_value_in_non_free_parameter(self):
         assert parameter.twin is None
         parameter.map["values"][:3] = 50.0
         parameter.map["is_set"][:3] = True
-        with pytest.warns(UserWarning, match="model contains non-free parameters"):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
             m.multifit(optimizer="lstsq")
 
     def test_set_value_in_non_free_parameter_twin(self):
@@ -351,7 +353,8 @@ def test_set_value_in_non_free_parameter_twin(self):
         assert parameter.twin is not None
         parameter.map["values"][:3] = 40.0
         parameter.map["is_set"][:3] = True
-        with pytest.warns(UserWarning, match="model contains non-free parameters"):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
             m.multifit(optimizer="lstsq")
 
     def test_set_value_in_free_parameter_twin(self):
@@ -389,6 +392,93 @@ def test_heteroscedastic_variance(self):
             m.multifit(optimizer="lstsq")
 
 
+@lazifyTestClass
+class TestMultifitLinearGrouped:
+    def setup_method(self, method):
+        rng = np.random.default_rng(1)
+        x = np.arange(100, dtype=float)
+        centres = np.array([[30.0, 30.0, 40.0, 40.0], [30.0, 50.0, 50.0, 40.0]])
+        data = np.exp(-((x - centres[..., np.newaxis]) ** 2) / 50)
+        data = 20 * data + 5 + rng.normal(scale=0.1, size=data.shape)
+        self.s = Signal1D(data)
+        self.centres = centres
+
+    def _create_model(self):
+        m = self.s.create_model()
+        m.extend([Gaussian(A=1, sigma=5, centre=30), Offset()])
+        m.set_parameters_not_free(only_nonlinear=True)
+        m[0].centre.map["values"] = self.centres
+        m[0].centre.map["is_set"] = True
+        return m
+
+    def _fit_iteratively(self, m):
+        for _ in m.axes_manager:
+            m.fetch_stored_values(only_fixed=True)
+            m.fit(optimizer="lstsq")
+            m.store_current_values()
+
+    def _compare(self, m, m2, mask=None):
+        for c, c2 in zip(m, m2):
+            for p, p2 in zip(c.parameters, c2.parameters):
+                values, values2 = p.map["values"], p2.map["values"]
+                if mask is not None:
+                    values, values2 = values[~mask], values2[~mask]
+                np.testing.assert_allclose(values, values2, rtol=1e-6)
+
+    @pytest.mark.parametrize("calculate_errors", [False, True])
+    def test_fixed_parameter_map(self, calculate_errors):
+        m = self._create_model()
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            m.multifit(optimizer="lstsq", calculate_errors=calculate_errors)
+        np.testing.assert_allclose(m[0].centre.map["values"], self.centres)
+        np.testing.assert_allclose(
+            m[0].A.map["values"], 20 * np.sqrt(50 * np.pi), rtol=1e-2
+        )
+        np.testing.assert_allclose(m[1].offset.map["values"], 5, rtol=1e-2)
+        assert np.all(m[0].A.map["is_set"])
+        assert np.isnan(m[0].A.map["std"]).all() != calculate_errors
+
+        m2 = self._create_model()
+        self._fit_iteratively(m2)
+        self._compare(m, m2)
+        if calculate_errors:
+            np.testing.assert_allclose(m[0].A.map["std"], m2[0].A.map["std"], rtol=1e-6)
+
+    def test_not_set_values(self):
+        m = self._create_model()
+        m[0].centre.map["is_set"][0] = False
+        m[0].centre.value = 40
+        m.multifit(optimizer="lstsq")
+        np.testing.assert_allclose(m[0].centre.map["values"][0], 40)
+        np.testing.assert_allclose(m[0].centre.map["values"][1], self.centres[1])
+
+    def test_active_is_multidimensional(self):
+        m = self._create_model()
+        m[1].active_is_multidimensional = True
+        m[1]._active_array[0, 1] = False
+        m.multifit(optimizer="lstsq")
+        offset = m[1].offset.map
+        assert not offset["is_set"][0, 1]
+        np.testing.assert_allclose(np.delete(offset["values"], 1), 5, rtol=1e-2)
+        # Without offset, the Gaussian compensates for the background
+        A = m[0].A.map["values"]
+        assert A[0, 1] > A[0, 0]
+        np.testing.assert_allclose(np.delete(A, 1), A[0, 0], rtol=1e-2)
+
+    def test_mask(self):
+        m = self._create_model()
+        mask = np.zeros(self.centres.shape, dtype=bool)
+        mask[1, 2] = True
+        m.multifit(optimizer="lstsq", mask=mask)
+        assert not m[0].A.map["is_set"][1, 2]
+        assert m[0].A.map["is_set"][~mask].all()
+
+        m2 = self._create_model()
+        self._fit_iteratively(m2)
+        self._compare(m, m2, mask=mask)
+
+
 class TestLinearModel2D:
     def setup_method(self, method):
         low, high = -10, 10
@@ -22,6 +22,7 @@
 import pytest
 
 import hyperspy.api as hs
+from hyperspy.component import Component
 from hyperspy.decorators import lazifyTestClass
 from hyperspy.misc.utils import slugify
 
@@ -78,6 +79,77 @@ def test_call_method_binned(self):
         np.testing.assert_allclose(m[0].function(0) * 0.3, r1)
 
 
+class TestModelDataCache:
+    def setup_method(self, method):
+        s = hs.signals.Signal1D(np.arange(100, dtype=float))
+        m = s.create_model()
+        m.extend(
+            [
+                hs.model.components1D.Gaussian(A=100, centre=30, sigma=5),
+                hs.model.components1D.Gaussian(A=100, centre=70, sigma=5),
+                hs.model.components1D.Offset(offset=2),
+            ]
+        )
+        for component in m:
+            component.function = mock.Mock(wraps=component.function)
+        self.m = m
+
+    def _expected(self):
+        axis = self.m.axis.axis[self.m._channel_switches]
+        return sum(c.function._mock_wraps(axis) for c in self.m if c.active)
+
+    def test_only_changed_components_evaluated(self):
+        m = self.m
+        np.testing.assert_allclose(m._get_current_data(), self._expected())
+        m[0].centre.value = 35
+        np.testing.assert_allclose(m._get_current_data(), self._expected())
+        assert m[0].function.call_count == 2
+        assert m[1].function.call_count == 1
+        assert m[2].function.call_count == 1
+
+    def test_invalidated_by_set_value(self):
+        m = self.m
+        m._get_current_data()
+        assert m[0]._model_data_cache is not None
+        m[0].A.value = 50
+        assert m[0]._model_data_cache is None
+        assert m[1]._model_data_cache is not None
+
+    def test_twin(self):
+        m = self.m
+        m[1].sigma.twin = m[0].sigma
+        m._get_current_data()
+        m[0].sigma.value = 8
+        assert m[1]._model_data_cache is None
+        np.testing.assert_allclose(m._get_current_data(), self._expected())
+        assert m[1].function.call_count == 2
+
+    def test_channel_switches(self):
+        m = self.m
+        m._get_current_data()
+        m.set_signal_range(10, 90)
+        np.testing.assert_allclose(m._get_current_data(), self._expected())
+        assert m[0].function.call_count == 2
+        data = m._get_current_data(ignore_channel_switches=True)
+        assert data.shape == (100,)
+        assert m[0].function.call_count == 3
+
+    def test_not_cacheable(self):
+        m = self.m
+        m[2]._model_data_cacheable = False
+        m._get_current_data()
+        m._get_current_data()
+        assert m[2].function.call_count == 2
+        assert m[0].function.call_count == 1
+
+    def test_fit(self):
+        m = self.m
+        m.signal.data = m._get_current_data() + 1
+        m.fit(grad="fd")
+        np.testing.assert_allclose(m[2].offset.value, 3)
+        np.testing.assert_allclose(m._get_current_data(), self._expected())
+
+
 class TestModelPlotCall:
     def setup_method(self, method):
         s = hs.signals.Signal1D(np.empty(1))
@@ -683,6 +755,89 @@ def test_out_argument(self):
         assert np.all(s.data == 4.0)
 
 
+class LinearNoFunctionND(Component):
+    def __init__(self):
+        Component.__init__(self, ("a",))
+
+    def function(self, x):
+        return self.a.value * x
+
+
+class TestAsSignalVectorized:
+    def setup_method(self, method):
+        rng = np.random.default_rng(1)
+        s = hs.signals.Signal1D(np.zeros((3, 4, 50)))
+        s.axes_manager[-1].scale = 0.2
+        m = s.create_model()
+        m.extend(
+            [
+                hs.model.components1D.Gaussian(),
+                hs.model.components1D.Offset(),
+                LinearNoFunctionND(),
+            ]
+        )
+        m[0].A.map["values"] = rng.uniform(1, 10, size=(3, 4))
+        m[0].centre.map["values"] = rng.uniform(2, 8, size=(3, 4))
+        m[0].sigma.map["values"] = rng.uniform(0.5, 2, size=(3, 4))
+        m[1].offset.map["values"] = rng.uniform(size=(3, 4))
+        m[2].a.map["values"] = rng.uniform(size=(3, 4))
+        for c in m:
+            for p in c.parameters:
+                p.map["is_set"] = True
+        self.m = m
+
+    def _as_signal_iter(self, component_list=None):
+        data = np.full(self.m.signal.data.shape, np.nan)
+        self.m._as_signal_iter(data, component_list=component_list)
+        return data
+
+    @pytest.mark.parametrize("component_list", [None, [0], [0, 1], [1, 2]])
+    def test_compare_iterator(self, component_list):
+        s = self.m.as_signal(component_list=component_list)
+        np.testing.assert_allclose(s.data, self._as_signal_iter(component_list))
+
+    def test_inactive_component(self):
+        self.m[1].active = False
+        s = self.m.as_signal()
+        np.testing.assert_allclose(s.data, self._as_signal_iter())
+        s = self.m.as_signal(component_list=[1])
+        np.testing.assert_allclose(
+            s.data,
+            np.broadcast_to(self.m[1].offset.map["values"][..., None], s.data.shape),
+        )
+        assert not self.m[1].active
+
+    def test_active_is_multidimensional(self):
+        self.m[0].active_is_multidimensional = True
+        self.m[0]._active_array[1, 2] = False
+        s = self.m.as_signal()
+        np.testing.assert_allclose(s.data, self._as_signal_iter())
+        assert self.m[0]._active_array.shape == (3, 4)
+
+    def test_binned_and_channel_switches(self):
+        self.m.signal.axes_manager[-1].is_binned = True
+        self.m._channel_switches[:10] = False
+        s = self.m.as_signal(component_list=[0, 1])
+        np.testing.assert_allclose(s.data, self._as_signal_iter([0, 1]))
+        assert np.isnan(s.data[..., :10]).all()
+
+    def test_no_function_nd(self):
+        with mock.patch.object(
+            self.m, "_as_signal_nd", side_effect=AssertionError
+        ) as mocked:
+            self.m.as_signal(component_list=[2])
+        mocked.assert_not_called()
+
+    def test_parameter_not_set(self):
+        # The current value is used where the value is not set
+        self.m[0].A.map["is_set"][0] = False
+        self.m[0].A.value = 20
+        s = self.m.as_signal(component_list=[0])
+        self.m[0].A.map["values"][0] = 20
+        self.m[0].A.map["is_set"][0] = True
+        np.testing.assert_allclose(s.data, self.m.as_signal(component_list=[0]).data)
+
+
 @lazifyTestClass
 class TestCreateModel:
     def setup_method(self, method):
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# Copyright 2007-2024 The HyperSpy developers
+#
+# This file is part of HyperSpy.
+#
+# HyperSpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HyperSpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
+
+
+import queue
+
+import cloudpickle
+import numpy as np
+import pytest
+
+import hyperspy.api as hs
+from hyperspy.samfire_utils.fit_tests import red_chisq_test
+from hyperspy.samfire_utils.samfire_pool import SamfirePool
+from hyperspy.samfire_utils.samfire_worker import create_worker
+
+
+class TestBatch:
+    def setup_method(self, method):
+        rng = np.random.default_rng(1)
+        s = hs.signals.Signal1D(rng.normal(2.0, 0.1, size=(3, 4, 20)))
+        s.metadata.Signal.set_item("Noise_properties.variance", s.deepcopy() * 0 + 0.01)
+        m = s.create_model()
+        m.append(hs.model.components1D.Offset())
+        m_slice = m.inav[0, 0]
+        m_slice.store("z")
+        m_dict = m_slice.signal._to_dictionary(False)
+        m_dict["models"] = m_slice.signal.models._models.as_dictionary()
+        self.m = m
+        self.worker = create_worker("worker")
+        self.worker.create_model(m_dict, "z")
+        self.worker.setup_test(cloudpickle.dumps(red_chisq_test(tolerance=2.0)))
+        self.inds = [(0, 1), (2, 3), (1, 2)]
+
+    def get_jobs(self):
+        var = self.m.signal.metadata.Signal.Noise_properties.variance
+        return [
+            (
+                ind,
+                {
+                    "Offset": {"offset": 1.0},
+                    "fitting_kwargs": {},
+                    "signal.data": self.m.signal.data[ind],
+                    "variance.data": var.data[ind],
+                },
+            )
+            for ind in self.inds
+        ]
+
+    def test_run_pixels(self):
+        keyword, (_id, results) = self.worker.run_pixels(self.get_jobs())
+        assert keyword == "results"
+        assert _id == "worker"
+        assert [ind for ind, _, _ in results] == self.inds
+        for ind, result, isgood in results:
+            assert isgood
+            np.testing.assert_allclose(
+                result["components"]["Offset"]["offset"]["values"],
+                self.m.signal.data[ind].mean(),
+            )
+
+    def test_run_pixels_queue(self):
+        worker = create_worker("worker", queue.Queue(), None, queue.Queue())
+        worker.model = self.worker.model
+        worker.parameters = self.worker.parameters
+        worker.fit_test = self.worker.fit_test
+        assert worker.run_pixels(self.get_jobs()) is None
+        keyword, (_, results) = worker.result_queue.get_nowait()
+        assert keyword == "results"
+        assert len(results) == 3
+        assert worker.result_queue.empty()
+
+    def test_update_batch(self):
+        _, (_, results) = self.worker.run_pixels(self.get_jobs())
+        results[1] = (results[1][0], results[1][1], False)
+        samf = self.m.create_samfire(workers=1, setup=False)
+        samf.count = 0
+        inds, dicts, isgood = zip(*results)
+        samf.update_batch(inds, dicts, isgood)
+        assert samf.count == 3
+        offset = self.m[0].offset.map
+        for ind in (self.inds[0], self.inds[2]):
+            np.testing.assert_allclose(
+                offset["values"][ind], self.m.signal.data[ind].mean()
+            )
+            assert samf.metadata.marker[ind] == -samf._scale
+        # The result of a bad fit is not stored
+        assert not offset["is_set"][self.inds[1]]
+        assert samf.metadata.marker[self.inds[1]] != -samf._scale
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr("hyperspy.utils.parallel_pool.cpu_count", lambda: 2)
+    pool = SamfirePool(ipyparallel=False, num_workers=1, batch_size=3)
+    yield pool
+    pool.pool.terminate()
+
+
+def test_pool_batch_arguments(pool):
+    assert pool.batch_size == 3
+    assert pool.jobs_per_worker == 1
+    with pytest.raises(ValueError):
+        SamfirePool(ipyparallel=False, num_workers=1, batch_size=0)
+
+
+class TestPoolBatch(TestBatch):
+    def test_need_pixels(self, pool):
+        samf = self.m.create_samfire(workers=1, setup=False)
+        pool.samf = samf
+        pool.shared_queue = queue.Queue()
+        samf.metadata.marker[:] = -samf._scale
+        assert pool.need_pixels == 3
+        pool.jobs_per_worker = 2
+        assert pool.need_pixels == 6
+        pool.shared_queue.put("job")
+        assert pool.need_pixels == 3
+
+    def test_add_jobs(self, pool):
+        samf = self.m.create_samfire(workers=1, setup=False)
+        pool.samf = samf
+        pool.shared_queue = queue.Queue()
+        samf.metadata.marker[:] = 1.0
+        samf.metadata.marker[0, 0] = -samf._scale
+        pool.add_jobs(5)
+        keyword, (jobs,) = pool.shared_queue.get_nowait()
+        assert keyword == "run_pixels"
+        assert len(jobs) == 3
+        keyword, (jobs,) = pool.shared_queue.get_nowait()
+        assert len(jobs) == 2
+        assert pool.shared_queue.empty()
+        assert len(samf.running_pixels) == 5
+
+    def test_parse_results(self, pool):
+        samf = self.m.create_samfire(workers=1, setup=False)
+        samf._log = []
+        pool.samf = samf
+        samf.count = 0
+        samf.running_pixels = list(self.inds[:2])
+        pool.parse(self.worker.run_pixels(self.get_jobs()))
+        assert samf.count == 2
+        assert samf.running_pixels == []
+        assert [log[0] for log in samf._log] == self.inds[:2]
+        assert [log[2] for log in samf._log] == [1, 2]
+        # Not running, hence discarded
+        assert not self.m[0].offset.map["is_set"][self.inds[2]]
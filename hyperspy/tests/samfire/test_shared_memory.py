@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# Copyright 2007-2024 The HyperSpy developers
+#
+# This file is part of HyperSpy.
+#
+# HyperSpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HyperSpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
+
+import cloudpickle
+import numpy as np
+import pytest
+
+import hyperspy.api as hs
+from hyperspy.samfire_utils.fit_tests import red_chisq_test
+from hyperspy.samfire_utils.samfire_worker import create_worker
+from hyperspy.samfire_utils.shared_memory import (
+    SharedArrays,
+    restore_model_arrays,
+    share_model_arrays,
+)
+
+
+def test_shared_arrays():
+    shared = SharedArrays()
+    data = np.arange(12.0).reshape(3, 4)
+    view = shared.add("data", data)
+    np.testing.assert_array_equal(view, data)
+    other = SharedArrays.attach(shared.spec)
+    other.arrays["data"][1, 2] = -1
+    assert view[1, 2] == -1
+    assert data[1, 2] == 6
+    other.close()
+    assert other.arrays == {}
+    del view
+    shared.unlink()
+
+
+def test_shared_arrays_structured():
+    shared = SharedArrays()
+    dtype = [("values", "float"), ("std", "float"), ("is_set", "bool")]
+    view = shared.add("map", np.zeros((2, 3), dtype=dtype))
+    other = SharedArrays.attach(shared.spec)
+    other.arrays["map"][1, 1] = (2.0, 0.5, True)
+    assert view["is_set"].sum() == 1
+    assert view["values"][1, 1] == 2.0
+    other.close()
+    del view
+    shared.unlink()
+
+
+class TestSharedMemoryWorker:
+    def setup_method(self, method):
+        g = hs.model.components1D.Gaussian(A=1000, sigma=5, centre=50)
+        x = np.arange(100.0)
+        s = hs.signals.Signal1D(np.tile(g.function(x), (2, 3, 1)))
+        s.metadata.Signal.set_item("Noise_properties.variance", s.deepcopy() + 1.0)
+        m = s.create_model()
+        m.append(hs.model.components1D.Gaussian(A=900, sigma=4, centre=48))
+        m.append(hs.model.components1D.Lorentzian(A=10, gamma=5, centre=20))
+        m[1].active_is_multidimensional = True
+        m.assign_current_values_to_all()
+        m_slice = m.inav[0, 0]
+        m_slice.store("z")
+        m_dict = m_slice.signal._to_dictionary(False)
+        m_dict["models"] = m_slice.signal.models._models.as_dictionary()
+        self.m = m
+        self.m_dict = m_dict
+        self.values = {
+            "Gaussian": {"A": 900, "sigma": 4, "centre": 48},
+            "Lorentzian": {"A": 10, "gamma": 5, "centre": 20},
+        }
+
+    def test_share_model_arrays(self):
+        m = self.m
+        shared = share_model_arrays(m)
+        names = {"signal.data", "variance.data", "chisq.data", "dof.data"}
+        names |= {"Lorentzian._active_array"}
+        names |= {f"{c.name}.{p.name}.map" for c in m for p in c.parameters}
+        assert set(shared.arrays) == names
+        assert m[0].A.map is shared.arrays["Gaussian.A.map"]
+        assert m.chisq.data is shared.arrays["chisq.data"]
+        assert m[1]._active_array is shared.arrays["Lorentzian._active_array"]
+        restore_model_arrays(m, shared)
+        assert shared.arrays == {}
+        m[0].A.map["values"][0, 0] = 1
+        assert m[0].A.map["values"][0, 0] == 1
+
+    @pytest.mark.parametrize("optional", (True, False))
+    def test_run_pixel(self, optional):
+        m = self.m
+        shared = share_model_arrays(m)
+        worker = create_worker("worker")
+        worker.create_model(self.m_dict, "z")
+        worker.setup_test(cloudpickle.dumps(red_chisq_test(tolerance=2.0)))
+        if optional:
+            worker.set_optional_names({"Lorentzian"})
+        worker.attach_shared_memory(shared.spec)
+        ind = (1, 2)
+        self.values["fitting_kwargs"] = {}
+        keyword, (_id, _ind, result, found_solution) = worker.run_pixel(
+            ind, self.values
+        )
+        assert keyword == "result"
+        assert _ind == ind
+        assert found_solution
+        # The results are written to the maps of the model, not sent back
+        assert result is None
+        np.testing.assert_allclose(m[0].A.map["values"][ind], 1000, rtol=1e-3)
+        np.testing.assert_allclose(m[0].centre.map["values"][ind], 50, rtol=1e-3)
+        assert m[0].A.map["is_set"][ind]
+        assert m[0].A.map["values"][0, 0] == 900
+        assert not np.isnan(m.chisq.data[ind])
+        assert np.isnan(m.chisq.data[0, 0])
+        assert m[1]._active_array[ind] != optional
+        assert m.dof.data[ind] == (3 if optional else 6)
+        worker.detach_shared_memory()
+        restore_model_arrays(m, shared)
+        np.testing.assert_allclose(m[0].A.map["values"][ind], 1000, rtol=1e-3)
+
+
+def test_run_pixel_sends_chisq_and_dof():
+    s = hs.signals.Signal1D(np.ones((2, 10)))
+    m = s.create_model()
+    m.append(hs.model.components1D.Offset())
+    m_slice = m.inav[0]
+    m_slice.store("z")
+    m_dict = m_slice.signal._to_dictionary(False)
+    m_dict["models"] = m_slice.signal.models._models.as_dictionary()
+    worker = create_worker("worker")
+    worker.create_model(m_dict, "z")
+    worker.setup_test(cloudpickle.dumps(red_chisq_test(tolerance=2.0)))
+    values = {
+        "Offset": {"offset": 0.5},
+        "fitting_kwargs": {},
+        "signal.data": s.data[1],
+    }
+    _, (_, _, result, found_solution) = worker.run_pixel((1,), values)
+    assert found_solution
+    assert set(result) == {"chisq.data", "dof.data", "components"}
+    assert result["dof.data"] == 1